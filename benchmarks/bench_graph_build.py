@@ -0,0 +1,66 @@
+"""Benchmark serial against process-pool graph construction.
+
+Usage: python -m benchmarks.bench_graph_build --projects 100000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# pylint: disable=wrong-import-position
+import benchmarks.synthetic as synthetic  # pylint: disable=consider-using-from-import, import-error
+import utils.graph_builder as graph_builder  # pylint: disable=consider-using-from-import, import-error
+import utils.ukri_utils as ukri_utils  # pylint: disable=consider-using-from-import, import-error
+
+
+def time_call(function, *args, **kwargs):
+    """
+    Return the result and wall time of a call.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """
+    Print serial and parallel build times with the speedup per worker count.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=100_000)
+    parser.add_argument("--people-per-project", type=int, default=3)
+    parser.add_argument("--funders", type=int, default=10)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+    )
+    args = parser.parse_args()
+
+    data = ukri_utils.parse_data(
+        synthetic.generate_projects(
+            args.projects, args.people_per_project, args.funders
+        )
+    )
+    serial_graph, serial_time = time_call(ukri_utils.create_networkx, data)
+    print(
+        f"records={len(data)} nodes={serial_graph.number_of_nodes()} "
+        f"edges={serial_graph.number_of_edges()}"
+    )
+    print(f"{'mode':<12}{'workers':>8}{'seconds':>10}{'speedup':>9}")
+    print(f"{'serial':<12}{1:>8}{serial_time:>10.2f}{1.0:>9.2f}")
+    for workers in args.workers:
+        _, parallel_time = time_call(
+            graph_builder.create_networkx_parallel, data, workers
+        )
+        print(
+            f"{'parallel':<12}{workers:>8}{parallel_time:>10.2f}"
+            f"{serial_time / parallel_time:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark app start up, importing main with and without the heavy RAG and render backends.
+
+Usage: python -m benchmarks.bench_startup --repeats 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HEAVY_MODULES = ["pyvis", "llama_index", "langchain", "langchain_openai", "openai"]
+# Modules that main used to import at start up, before they were loaded on first use.
+EAGER_MODULES = ["pyvis.network", "utils.llama_index_utils", "utils.langchain_utils"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def importable(module):
+    """
+    True if a module and its dependencies can be imported here.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        check=False,
+    )
+    return result.returncode == 0
+
+
+def time_imports(modules, repeats):
+    """
+    Median seconds to import modules in a fresh interpreter, and the heavy modules that were loaded.
+    """
+    script = IMPORT_SCRIPT.format(modules=modules, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output))
+    return {
+        "median_seconds": statistics.median(run["seconds"] for run in runs),
+        "runs": [run["seconds"] for run in runs],
+        "loaded": runs[-1]["loaded"],
+    }
+
+
+def main():
+    """
+    Print lazy and eager start up times and optionally write them as JSON.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    eager = [module for module in EAGER_MODULES if importable(module)]
+    if skipped := sorted(set(EAGER_MODULES) - set(eager)):
+        print(f"Not installed, excluded from the eager run: {', '.join(skipped)}")
+
+    results = {
+        "lazy": time_imports(["main"], args.repeats),
+        "eager": time_imports(["main"] + eager, args.repeats),
+    }
+    print(f"{'mode':<8}{'median s':>10}  loaded")
+    for mode, result in results.items():
+        loaded = ", ".join(result["loaded"]) or "-"
+        print(f"{mode:<8}{result['median_seconds']:>10.3f}  {loaded}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as results_file:
+            json.dump(results, results_file, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare two benchmark results files stage by stage.
+
+Usage: python -m benchmarks.compare baseline.json candidate.json --threshold 1.2
+"""
+
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    """
+    Read a results file written by benchmarks.run.
+    """
+    with open(path, "r", encoding="utf-8") as results_file:
+        return json.load(results_file)
+
+
+def compare_results(baseline, candidate, threshold):
+    """
+    Return (stage, baseline seconds, candidate seconds, ratio, regressed) rows.
+    """
+    rows = []
+    for name, stage in candidate.get("stages", {}).items():
+        baseline_stage = baseline.get("stages", {}).get(name)
+        if not baseline_stage:
+            continue
+        before = baseline_stage["median_seconds"]
+        after = stage["median_seconds"]
+        ratio = after / before if before else float("inf")
+        rows.append((name, before, after, ratio, ratio > threshold))
+    return rows
+
+
+def main():
+    """
+    Print the comparison and exit non-zero when any stage regressed.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="Slowdown ratio above which a stage counts as a regression.",
+    )
+    args = parser.parse_args()
+
+    baseline, candidate = load_results(args.baseline), load_results(args.candidate)
+    if baseline.get("parameters") != candidate.get("parameters"):
+        print("Warning: benchmark parameters differ between files.")
+
+    rows = compare_results(baseline, candidate, args.threshold)
+    print(f"{'stage':<28}{'before s':>10}{'after s':>10}{'ratio':>8}")
+    for name, before, after, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<28}{before:>10.3f}{after:>10.3f}{ratio:>8.2f}{flag}")
+    sys.exit(1 if any(row[-1] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Local mock of the GtR search and project endpoints serving synthetic payloads."""
+
+import contextlib
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import benchmarks.synthetic as synthetic  # pylint: disable=consider-using-from-import, import-error
+
+
+class MockGtrServer(ThreadingHTTPServer):
+    """
+    HTTP server holding the synthetic projects and request counters.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, projects, latency=0.0, address=("127.0.0.1", 0)):
+        self.projects = projects
+        self.overviews = {
+            project["projectComposition"]["project"]["grantReference"]: (
+                synthetic.generate_project_overview(project)
+            )
+            for project in projects
+        }
+        self.latency = latency
+        self.request_counts = {"search": 0, "projects": 0}
+        self.lock = threading.Lock()
+        super().__init__(address, MockGtrHandler)
+
+    @property
+    def api_url(self):
+        """
+        Base url to use in place of config.GTR_API_URL.
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+
+class MockGtrHandler(BaseHTTPRequestHandler):
+    """
+    Serve /api/search/project and /api/projects like the GtR api.
+    """
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Route a GET request to the matching synthetic payload.
+        """
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if url.path == "/api/search/project":
+            self.count("search")
+            page = int(query.get("page", ["1"])[0])
+            fetch_size = int(query.get("fetchSize", ["100"])[0])
+            start = (page - 1) * fetch_size
+            results = self.server.projects[start : start + fetch_size]
+            self.send_json({"facetedSearchResultBean": {"results": results}})
+        elif url.path == "/api/projects":
+            self.count("projects")
+            reference = query.get("ref", [""])[0]
+            if overview := self.server.overviews.get(reference):
+                self.send_json({"projectOverview": overview})
+            else:
+                self.send_json({}, status=404)
+        else:
+            self.send_json({}, status=404)
+
+    def count(self, name):
+        """
+        Increment a request counter.
+        """
+        with self.server.lock:
+            self.server.request_counts[name] += 1
+
+    def send_json(self, payload, status=200):
+        """
+        Write a JSON response.
+        """
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Silence per request logging.
+        """
+
+
+@contextlib.contextmanager
+def serve(projects, latency=0.0):
+    """
+    Run a mock server in a background thread for the duration of the context.
+    """
+    server = MockGtrServer(projects, latency)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+if __name__ == "__main__":
+    pass
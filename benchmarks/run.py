@@ -0,0 +1,249 @@
+"""Benchmark the fetch, parse, graph and render pipeline against a mock GtR server.
+
+Usage: python -m benchmarks.run --projects 1000 --people-per-project 3 --funders 10 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# pylint: disable=wrong-import-position
+import benchmarks.mock_gtr_server as mock_gtr_server  # pylint: disable=consider-using-from-import, import-error
+import benchmarks.synthetic as synthetic  # pylint: disable=consider-using-from-import, import-error
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.entity_resolution as entity_resolution  # pylint: disable=consider-using-from-import, import-error
+import utils.ukri_utils as ukri_utils  # pylint: disable=consider-using-from-import, import-error
+
+SEARCH_TERM = "synthetic"
+FILTER_NODE_COUNT = 10
+
+
+def augment(data, project_data_lookup):
+    """
+    Join project details onto parsed records as fetch_search_data does.
+    """
+    return [
+        {
+            **project,
+            "project_data_lookup": project_data_lookup.get(
+                project.get("project_grant_reference", ""), {}
+            ),
+        }
+        for project in data
+    ]
+
+
+def find_filter_neighbors(graph):
+    """
+    Two hop neighbourhood of the best connected nodes, as used by the filter form.
+    """
+    filter_nodes = sorted(graph, key=graph.degree, reverse=True)[:FILTER_NODE_COUNT]
+    neighbors = ukri_utils.find_neighbor_nodes_helper(filter_nodes, graph)
+    return ukri_utils.find_neighbor_nodes_helper(neighbors, graph)
+
+
+def pipeline(number_of_results):
+    """
+    Ordered (stage name, callable) pairs, each taking and returning the shared state.
+    """
+    return [
+        (
+            "fetch_search",
+            lambda state: state.update(
+                projects=ukri_utils.search_ukri_paginate(SEARCH_TERM, number_of_results)
+            ),
+        ),
+        (
+            "parse_data",
+            lambda state: state.update(data=ukri_utils.parse_data(state["projects"])),
+        ),
+        (
+            "fetch_project_data",
+            lambda state: state.update(
+                lookup=ukri_utils.get_project_data(state["data"])
+            ),
+        ),
+        (
+            "resolve_entities",
+            lambda state: state.update(
+                data=entity_resolution.resolve_entities(
+                    augment(state["data"], state["lookup"])
+                )
+            ),
+        ),
+        (
+            "create_networkx",
+            lambda state: state.update(graph=ukri_utils.create_networkx(state["data"])),
+        ),
+        (
+            "annotate_networkx_data",
+            lambda state: ukri_utils.annotate_networkx_data(state["graph"]),
+        ),
+        (
+            "annotate_value_on_graph",
+            lambda state: ukri_utils.annotate_value_on_graph(state["graph"]),
+        ),
+        (
+            "find_neighbor_nodes_helper",
+            lambda state: find_filter_neighbors(state["graph"]),
+        ),
+        (
+            "convert_graph",
+            lambda state: state.update(net=ukri_utils.convert_graph(state["graph"])),
+        ),
+        ("render_html", lambda state: state["net"].generate_html()),
+    ]
+
+
+def run_pipeline(stages, trace_memory=False):
+    """
+    Run every stage once, returning seconds or peak traced MiB per stage.
+    """
+    state, measurements = {}, {}
+    for name, stage in stages:
+        if trace_memory:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            stage(state)
+            _, peak = tracemalloc.get_traced_memory()
+            measurements[name] = (peak - baseline) / 2**20
+        else:
+            start = time.perf_counter()
+            stage(state)
+            measurements[name] = time.perf_counter() - start
+    return state, measurements
+
+
+def git_revision():
+    """
+    Current git commit, if available.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(  # pylint: disable=too-many-arguments, too-many-locals
+    projects, people_per_project, funders, repeats=3, latency=0.0, seed=0
+):
+    """
+    Benchmark every stage against a mock server, returning the results document.
+    """
+    payload = synthetic.generate_projects(
+        projects, people_per_project, funders, seed=seed
+    )
+    stages = pipeline(projects)
+    timings = {name: [] for name, _ in stages}
+    api_url = config.GTR_API_URL
+    with mock_gtr_server.serve(payload, latency) as server:
+        config.GTR_API_URL = server.api_url
+        try:
+            for _ in range(repeats):
+                state, measurements = run_pipeline(stages)
+                for name, seconds in measurements.items():
+                    timings[name].append(seconds)
+            tracemalloc.start()
+            try:
+                _, peaks = run_pipeline(stages, trace_memory=True)
+            finally:
+                tracemalloc.stop()
+        finally:
+            config.GTR_API_URL = api_url
+        request_counts = dict(server.request_counts)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "parameters": {
+            "projects": projects,
+            "people_per_project": people_per_project,
+            "funders": funders,
+            "repeats": repeats,
+            "latency": latency,
+            "seed": seed,
+        },
+        "graph": {
+            "records": len(state["data"]),
+            "nodes": state["graph"].number_of_nodes(),
+            "edges": state["graph"].number_of_edges(),
+            "requests": request_counts,
+        },
+        "stages": {
+            name: {
+                "median_seconds": statistics.median(timings[name]),
+                "min_seconds": min(timings[name]),
+                "runs": timings[name],
+                "peak_mib": peaks[name],
+            }
+            for name, _ in stages
+        },
+    }
+
+
+def print_results(results):
+    """
+    Print a per stage summary table.
+    """
+    graph = results["graph"]
+    print(f"records={graph['records']} nodes={graph['nodes']} edges={graph['edges']}")
+    print(f"{'stage':<28}{'median s':>10}{'min s':>10}{'peak MiB':>10}")
+    for name, stage in results["stages"].items():
+        print(
+            f"{name:<28}{stage['median_seconds']:>10.3f}"
+            f"{stage['min_seconds']:>10.3f}{stage['peak_mib']:>10.1f}"
+        )
+
+
+def main():
+    """
+    Run the benchmark and write the machine readable results file.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--people-per-project", type=int, default=3)
+    parser.add_argument("--funders", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Mock server latency in seconds."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="./output/benchmark_results.json")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        args.projects,
+        args.people_per_project,
+        args.funders,
+        args.repeats,
+        args.latency,
+        args.seed,
+    )
+    print_results(results)
+    if directory := os.path.dirname(args.output):
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
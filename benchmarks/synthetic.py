@@ -0,0 +1,115 @@
+"""Synthetic GtR payload generator used by the benchmarks and tests."""
+
+import random
+import uuid
+
+API_URL = "http://gtr.ukri.org/api"
+ROLES = ["PRINCIPAL_INVESTIGATOR", "CO_INVESTIGATOR", "RESEARCHER", "PROJECT_MANAGER"]
+FIRST_NAMES = ["Alice", "Ben", "Chloe", "David", "Emma", "Farah", "George", "Hannah"]
+SURNAMES = ["Smith", "Jones", "Taylor", "Brown", "Williams", "Wilson", "Evans", "Khan"]
+
+
+def stable_id(rng):
+    """
+    Deterministic uuid from the generator state.
+    """
+    return str(uuid.UUID(int=rng.getrandbits(128))).upper()
+
+
+def make_organisations(rng, count, prefix):
+    """
+    Organisation references with ids and resource urls.
+    """
+    organisations = []
+    for index in range(count):
+        organisation_id = stable_id(rng)
+        organisations.append(
+            {
+                "id": organisation_id,
+                "resourceUrl": f"{API_URL}/organisation/{organisation_id}",
+                "name": f"{prefix} {index}",
+            }
+        )
+    return organisations
+
+
+def make_people(rng, count):
+    """
+    Person references, names repeat so the graph has realistic collisions.
+    """
+    people = []
+    for index in range(count):
+        person_id = stable_id(rng)
+        first_name = rng.choice(FIRST_NAMES)
+        surname = f"{rng.choice(SURNAMES)}{index}"
+        people.append(
+            {
+                "id": person_id,
+                "resourceUrl": f"{API_URL}/person/{person_id}",
+                "firstName": first_name,
+                "surname": surname,
+                "fullName": f"{first_name} {surname}",
+            }
+        )
+    return people
+
+
+def generate_projects(  # pylint: disable=too-many-arguments
+    projects=1000,
+    people_per_project=3,
+    funders=10,
+    organisations=None,
+    projects_per_person=3,
+    seed=0,
+):
+    """
+    Generate search results in the shape returned by the GtR project search api.
+    """
+    rng = random.Random(seed)
+    funder_pool = make_organisations(rng, funders, "Funder")
+    organisation_pool = make_organisations(
+        rng, organisations or max(1, projects // 20), "Research Organisation"
+    )
+    people_pool = make_people(
+        rng, max(1, projects * people_per_project // max(1, projects_per_person))
+    )
+
+    results = []
+    for index in range(projects):
+        grant_reference = f"SYN/{index:07d}"
+        person_roles = [
+            {**person, "roles": [{"name": rng.choice(ROLES)}]}
+            for person in rng.sample(
+                people_pool, min(people_per_project, len(people_pool))
+            )
+        ]
+        results.append(
+            {
+                "projectComposition": {
+                    "project": {
+                        "id": stable_id(rng),
+                        "resourceUrl": f"{API_URL}/projects?ref={grant_reference}",
+                        "title": f"Synthetic project {index}",
+                        "grantReference": grant_reference,
+                        "fund": {
+                            "valuePounds": rng.randint(10_000, 5_000_000),
+                            "funder": rng.choice(funder_pool),
+                        },
+                    },
+                    "leadResearchOrganisation": rng.choice(organisation_pool),
+                    "personRoles": person_roles,
+                }
+            }
+        )
+    return results
+
+
+def generate_project_overview(project):
+    """
+    Project detail payload for a search result, as returned by the GtR projects api.
+    """
+    return {"projectComposition": project.get("projectComposition", {})}
+
+
+if __name__ == "__main__":
+    pass
@@ -2,9 +2,9 @@
 
 import logging
 import streamlit as st
-import networkx as nx
-import utils.ukri_utils as ukri_utils  # pylint: disable=consider-using-from-import, import-error
 import utils.ui_utils as ui_utils  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -15,6 +15,7 @@ def main():
     """
     Main function for rendering the UI of the streamlit application.
     """
+    telemetry.start_metrics_server()
     st.title("[UK Research and Innovation Funding (UKRI) Graph](https://www.ukri.org/)")
 
     tab1, tab2, tab3, tab4 = st.tabs(["Graph Data", "Sign Up", "Disclaimer", "Article"])
@@ -24,35 +25,18 @@ def main():
             search_term = st.text_input(
                 "Search for projects here", key="search_projects_term"
             )
-            number_of_results = st.slider("Number of results?", 100, 400, 200, 50)
+            number_of_results = st.slider(
+                "Number of results?", 100, config.MAX_NUMBER_OF_RESULTS, 200, 50
+            )
             if st.form_submit_button("Submit"):
-                with st.spinner("Getting data please wait"):
-                    ukri_utils.search_ukri_workflow(search_term, number_of_results)
+                ui_utils.submit_search_job(search_term, number_of_results)
+        ui_utils.render_search_job_status()
 
         if data := st.session_state.get("data"):
-            graph = ukri_utils.create_networkx(data)
-            annotated_node_data = ukri_utils.annotate_networkx_data(graph)
-            ukri_utils.render_filter_form(annotated_node_data, graph)
-            graph = nx.subgraph_view(graph, filter_node=ukri_utils.filter_node)
-            ukri_utils.annotate_value_on_graph(graph)
-            net = ukri_utils.convert_graph(graph)
+            ui_utils.render_graph_view(data)
 
-            if (filter_determinant := st.session_state.get("filter")) and (
-                filter_determinant == "Filter results"
-            ):
-                if st.session_state.get("search_nodes_label"):
-                    graph_ui, graph_rag = st.tabs(["Render graph", "Graph RAG"])
-                    with graph_ui:
-                        if st.button("Render graph"):
-                            with st.spinner("Rendering graph, please wait"):
-                                ukri_utils.render_graphs(net)
-                    with graph_rag:
-                        ui_utils.render_graph_rag_interface(graph)
-                        ui_utils.render_chat_results()
-            else:
-                if st.button("Render graph"):
-                    with st.spinner("Rendering graph, please wait"):
-                        ukri_utils.render_graphs(net)
+        if config.DEBUG_PANEL and st.query_params.get("debug"):
+            ui_utils.render_debug_panel()
 
     with tab2:
         st.components.v1.iframe(
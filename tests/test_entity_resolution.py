@@ -0,0 +1,99 @@
+"""Unit tests for the entity_resolution module."""
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.entity_resolution # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.ukri_utils # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+PERSON_URL = "http://gtr.ukri.org/api/person/"
+ORG_URL = "http://gtr.ukri.org/api/organisation/"
+
+def make_record(title, org_name, org_id, people):
+    "Parsed project record with the given lead organisation and (name, id) people"
+    return {
+        "funder_name": "Innovate UK",
+        "funder_link": f"{ORG_URL}FUNDER",
+        "project_title": title,
+        "value": 100,
+        "lead_research_organisation": org_name,
+        "lead_research_organisation_link": f"{ORG_URL}{org_id}",
+        "people": [
+            {"fullName": name, "resourceUrl": f"{PERSON_URL}{person_id}", "roles": [{"name": "PI"}]}
+            for name, person_id in people
+        ],
+    }
+
+def people_names(records):
+    "Flatten resolved person names per record"
+    return [[person["fullName"] for person in record["people"]] for record in records]
+
+class Testing(unittest.TestCase):
+    "Testing class for entity_resolution related tests"
+
+    def test_same_id_spelling_variants_merge(self):
+        "One resource id always resolves to its most common display name"
+        data = [
+            make_record("P1", "University of Leeds", "ORG1", [("Jane Smith", "AAA")]),
+            make_record("P2", "University of Leeds", "ORG1", [("Jane Smith", "AAA")]),
+            make_record("P3", "University of Leeds", "ORG1", [("Jane  Smyth", "AAA")]),
+        ]
+        result = utils.entity_resolution.resolve_entities(data)
+        self.assertEqual(people_names(result), [["Jane Smith"]] * 3)
+
+    def test_same_name_different_people_kept_apart(self):
+        "Different ids at unrelated organisations keep separate labels"
+        data = [
+            make_record("P1", "University of Leeds", "ORG1", [("Jane Smith", "AAAAAAAAAA")]),
+            make_record("P2", "University of Leeds", "ORG1", [("Jane Smith", "AAAAAAAAAA")]),
+            make_record("P3", "University of Bath", "ORG2", [("Jane Smith", "BBBBBBBBBB")]),
+        ]
+        result = utils.entity_resolution.resolve_entities(data)
+        self.assertEqual(people_names(result), [["Jane Smith"], ["Jane Smith"], ["Jane Smith [BBBBBBBB]"]])
+
+    def test_fuzzy_match_within_organisation(self):
+        "Variants sharing an organisation and a collaborator merge, conflicting first names do not"
+        data = [
+            make_record("P1", "University of Leeds", "ORG1", [("Jane Smith", "A1"), ("John Smith", "A2")]),
+            make_record("P2", "University of Leeds", "ORG1", [("Jane Smith", "A1")]),
+            make_record("P3", "University of Leeds", "ORG1", [("Jane Smith-", "A3"), ("J. Smith", "A4"), ("John Smith", "A2")]),
+        ]
+        result = utils.entity_resolution.resolve_entities(data)
+        self.assertEqual(
+            people_names(result),
+            [["Jane Smith", "John Smith"], ["Jane Smith"], ["Jane Smith", "J. Smith", "John Smith"]],
+        )
+
+    def test_name_alone_does_not_merge(self):
+        "Same name ids at one organisation without a shared collaborator stay apart"
+        data = [
+            make_record("P1", "University of Leeds", "ORG1", [("Jane Smith", "AAAAAAAAAA"), ("Ann Lee", "C1")]),
+            make_record("P2", "University of Leeds", "ORG1", [("Jane Smith", "BBBBBBBBBB"), ("Bob Ray", "C2")]),
+        ]
+        result = utils.entity_resolution.resolve_entities(data)
+        self.assertEqual(
+            people_names(result), [["Jane Smith", "Ann Lee"], ["Jane Smith [BBBBBBBB]", "Bob Ray"]]
+        )
+
+    def test_people_on_the_same_project_kept_apart(self):
+        "Two ids with the same name on one project are different people and different nodes"
+        data = [make_record("P1", "University of Leeds", "ORG1", [("Wei Zhang", "ID1"), ("Wei Zhang", "ID2")])]
+        result = utils.entity_resolution.resolve_entities(data)
+        self.assertEqual(people_names(result), [["Wei Zhang", "Wei Zhang [ID2]"]])
+        graph = utils.ukri_utils.create_networkx(result)
+        people = [node for node, group in graph.nodes(data="group") if group == "person_name"]
+        self.assertEqual(sorted(people), ["Wei Zhang", "Wei Zhang [ID2]"])
+
+    def test_organisation_variants_merge(self):
+        "Organisation names differing only by case or punctuation merge"
+        data = [
+            make_record("P1", "UNIVERSITY OF LEEDS", "ORG1", []),
+            make_record("P2", "University of Leeds.", "ORG9", []),
+            make_record("P3", "University of Leeds.", "ORG9", []),
+        ]
+        result = utils.entity_resolution.resolve_entities(data)
+        self.assertEqual({record["lead_research_organisation"] for record in result}, {"University of Leeds."})
+
+if __name__ == "__main__":
+    unittest.main()
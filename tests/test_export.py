@@ -0,0 +1,110 @@
+"""Unit tests for the export module."""
+import unittest
+import sys
+import os
+import csv
+import gzip
+import io
+import json
+import tempfile
+import threading
+import urllib.request
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import benchmarks.synthetic # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.export as export # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.ukri_utils # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+class Testing(unittest.TestCase):
+    "Testing class for export related tests"
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory() # pylint: disable=consider-using-with
+        self.data = utils.ukri_utils.parse_data(
+            benchmarks.synthetic.generate_projects(projects=250, people_per_project=3, funders=4, seed=5)
+        )
+        self.dataset = export.save_dataset("Quantum", 250, self.data, self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_saved_dataset_round_trip(self):
+        "Saved records are listed and streamed back unchanged"
+        self.assertEqual(export.dataset_id(" quantum ", 250), self.dataset)
+        datasets = export.list_datasets(self.directory.name)
+        self.assertEqual([(item["id"], item["records"]) for item in datasets], [(self.dataset, 250)])
+        self.assertEqual(list(export.iter_dataset(self.dataset, self.directory.name)), self.data)
+
+    def test_oldest_datasets_are_pruned(self):
+        "Only the newest datasets are kept and no temporary files are left behind"
+        for index in range(3):
+            export.save_dataset(f"search {index}", 10, self.data[:10], self.directory.name, max_datasets=2)
+        datasets = export.list_datasets(self.directory.name)
+        self.assertEqual([item["search_term"] for item in datasets], ["search 2", "search 1"])
+        self.assertEqual(len(os.listdir(self.directory.name)), 4)
+
+    def test_concurrent_saves_of_the_same_search(self):
+        "Sessions saving the same search at once each write their own temporary file"
+        errors = []
+
+        def save():
+            try:
+                export.save_dataset("Quantum", 250, self.data, self.directory.name)
+            except OSError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=save) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(errors, [])
+        self.assertEqual(list(export.iter_dataset(self.dataset, self.directory.name)), self.data)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), [f"{self.dataset}.jsonl.gz", f"{self.dataset}.meta.json"])
+
+    def test_formats_in_chunks(self):
+        "Every format holds every row and Parquet is written as one row group per chunk"
+        output = io.BytesIO()
+        count = export.write_table("records", export.iter_record_rows(self.data), output, "parquet", 100)
+        parquet = pq.ParquetFile(io.BytesIO(output.getvalue()))
+        self.assertEqual((count, parquet.metadata.num_row_groups), (250, 3))
+        table = parquet.read()
+        self.assertEqual(table.column("project_title").to_pylist(), [row["project_title"] for row in self.data])
+        self.assertEqual(json.loads(table.column("people")[0].as_py()), self.data[0]["people"])
+
+        graph = utils.ukri_utils.create_networkx(self.data)
+        output = io.BytesIO()
+        export.write_table("edges", export.iter_edge_rows(graph), output, "arrow", 100)
+        edges = pa.ipc.open_stream(output.getvalue()).read_all()
+        self.assertEqual(edges.num_rows, graph.number_of_edges())
+        self.assertIn("FUNDED", edges.column("role").to_pylist())
+
+        output = io.BytesIO()
+        export.write_table("nodes", export.iter_node_rows(graph), output, "csv.gz", 100)
+        with gzip.open(io.BytesIO(output.getvalue()), "rt", encoding="utf-8") as text:
+            nodes = list(csv.DictReader(text))
+        self.assertEqual(len(nodes), graph.number_of_nodes())
+
+    def test_http_export(self):
+        "The HTTP entry point lists datasets and streams exports"
+        server = export.create_export_server(0, self.directory.name)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/datasets"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertEqual(json.load(response)[0]["id"], self.dataset)
+            with urllib.request.urlopen(f"{url}/{self.dataset}/nodes.parquet", timeout=5) as response:
+                nodes = pq.read_table(io.BytesIO(response.read()))
+            self.assertEqual(nodes.num_rows, utils.ukri_utils.create_networkx(self.data).number_of_nodes())
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{url}/missing/nodes.parquet", timeout=5) # pylint: disable=consider-using-with
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+if __name__ == '__main__':
+    unittest.main()
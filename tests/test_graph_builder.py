@@ -0,0 +1,91 @@
+"""Unit tests for the graph_builder module."""
+import unittest
+import sys
+import os
+import threading
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import benchmarks.synthetic # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.graph_builder # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.ukri_utils # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+def graph_tables(graph):
+    "Ordered node data and edge data of a graph for comparison"
+    return list(graph.nodes(data=True)), sorted(graph.edges(data=True), key=lambda edge: edge[:2])
+
+def build_example_data():
+    "Synthetic records with repeated people, a shared project title and lookups"
+    data = utils.ukri_utils.parse_data(
+        benchmarks.synthetic.generate_projects(projects=400, people_per_project=4, funders=5, seed=7)
+    )
+    for index, row in enumerate(data):
+        row["project_data_lookup"] = {"index": index}
+    # A project title seen twice with a different role for the same person.
+    repeated = dict(data[10])
+    repeated["people"] = [{**data[10]["people"][0], "roles": [{"name": "NEW_ROLE"}]}]
+    data.append(repeated)
+    return data
+
+class Testing(unittest.TestCase):
+    "Testing class for graph_builder related tests"
+
+    def test_tables_match_serial_builder(self):
+        "Merging many shard tables reproduces the serial graph exactly"
+        data = build_example_data()
+        expected = utils.ukri_utils.create_networkx(data)
+        tables = [
+            utils.ukri_utils.build_partial_tables(data[start:end])
+            for start, end in utils.graph_builder.shard_bounds(len(data), 9)
+        ]
+        result = utils.ukri_utils.merge_partial_tables(
+            tables, utils.ukri_utils.first_project_data_lookup(data)
+        )
+        self.assertEqual(graph_tables(result), graph_tables(expected))
+
+    def test_process_pool_matches_serial_builder(self):
+        "The process pool build reproduces the serial graph exactly"
+        data = build_example_data()
+        expected = utils.ukri_utils.create_networkx(data)
+        result = utils.graph_builder.create_networkx_parallel(data, workers=2, shard_count=5)
+        self.assertEqual(graph_tables(result), graph_tables(expected))
+
+    def test_concurrent_builds_keep_their_own_records(self):
+        "Parallel builds running at the same time each return the graph of their own records"
+        datasets = [
+            utils.ukri_utils.parse_data(
+                benchmarks.synthetic.generate_projects(projects=projects, people_per_project=3, funders=4, seed=seed)
+            )
+            for projects, seed in ((150, 1), (320, 2))
+        ]
+        expected = [graph_tables(utils.ukri_utils.create_networkx(data)) for data in datasets]
+        results = [None] * len(datasets)
+
+        def build(index):
+            results[index] = utils.graph_builder.create_networkx_parallel(
+                datasets[index], workers=2, shard_count=4
+            )
+
+        for _ in range(3):
+            results[:] = [None] * len(datasets)
+            threads = [threading.Thread(target=build, args=(index,)) for index in range(len(datasets))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(60)
+            self.assertEqual([graph_tables(result) for result in results], expected)
+
+    def test_build_graph_is_serial_unless_enabled(self):
+        "The process pool is only used once a threshold is configured and reached"
+        data = build_example_data()
+        with mock.patch.object(
+            utils.graph_builder, "create_networkx_parallel", return_value=utils.ukri_utils.create_networkx(data)
+        ) as parallel:
+            utils.graph_builder.build_graph(data)
+            with mock.patch.object(utils.graph_builder.config, "PARALLEL_BUILD_THRESHOLD", len(data)), \
+                    mock.patch.object(utils.graph_builder.config, "GRAPH_BUILD_WORKERS", 2):
+                utils.graph_builder.build_graph(data)
+        self.assertEqual(parallel.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Unit tests for the graph_context module."""
+import unittest
+import sys
+import os
+import networkx as nx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.graph_context # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+def add_project(graph, index, funding=1000, people=2):
+    "Add a funded project with a lead organisation and people"
+    project = f"Project {index}"
+    graph.add_node(project, group="project_title", funding=funding)
+    graph.add_node("Funder", group="funder_name")
+    graph.add_edge("Funder", project, value=funding, label=f"£{funding:,.2f}")
+    graph.add_node(f"University {index}", group="lead_research_organisation", funding=funding)
+    graph.add_edge(f"University {index}", project, title="RELATES TO")
+    for person in range(people):
+        role = "PRINCIPAL_INVESTIGATOR" if person == 0 else "RESEARCHER"
+        graph.add_node(f"Person {index} {person}", group="person_name")
+        graph.add_edge(f"Person {index} {person}", project, title=role, label=role)
+
+class Testing(unittest.TestCase):
+    "Testing class for graph context related tests"
+
+    def test_find_entities(self):
+        "Entities are found by name in the question, preferring the longest match"
+        graph = nx.DiGraph()
+        add_project(graph, 1)
+        add_project(graph, 12)
+        graph.add_node("Quantum sensing for medical imaging", group="project_title")
+        index = utils.graph_context.GraphContextIndex(graph)
+        self.assertEqual(index.find_entities("Who works on project 12?"), ["Project 12"])
+        self.assertEqual(
+            index.find_entities("Who leads Quantum sensing for medicle imaging?"),
+            ["Quantum sensing for medical imaging"],
+        )
+
+    def test_context_is_bounded_and_ranked(self):
+        "Only nearby edges within the budget are returned, lead roles before other roles"
+        graph = nx.DiGraph()
+        add_project(graph, 1, people=30)
+        add_project(graph, 2)
+        index = utils.graph_context.GraphContextIndex(graph)
+
+        entities, triples = index.extract("Who leads Project 1?", hops=1)
+        self.assertEqual(entities, ["Project 1"])
+        self.assertNotIn("Project 2", {node for triple in triples for node in triple})
+        self.assertEqual(triples[0], ("Person 1 0", "PRINCIPAL_INVESTIGATOR", "Project 1"))
+
+        _, limited = index.extract("Who leads Project 1?", hops=1, token_budget=20)
+        self.assertLess(len(limited), len(triples))
+        self.assertLessEqual(
+            sum(utils.graph_context.estimate_tokens(" ".join(triple)) for triple in limited), 20
+        )
+
+    def test_context_size_is_flat_as_graph_grows(self):
+        "The context for a question does not depend on unrelated parts of the graph"
+        contexts = []
+        for projects in [10, 1000]:
+            graph = nx.DiGraph()
+            for index in range(projects):
+                add_project(graph, index)
+            index = utils.graph_context.GraphContextIndex(graph)
+            contexts.append(index.extract("What does University 3 fund?")[1])
+        self.assertEqual(len(contexts[0]), len(contexts[1]))
+        self.assertLessEqual(len(contexts[1]), 2 * utils.graph_context.config.GRAPH_CONTEXT_MAX_NEIGHBORS)
+
+if __name__ == '__main__':
+    unittest.main()
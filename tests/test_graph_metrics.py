@@ -0,0 +1,78 @@
+"""Unit tests for the graph_metrics module."""
+import unittest
+import sys
+import os
+import networkx as nx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.graph_metrics # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.ukri_utils # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+def build_example_graph():
+    "Small funding graph with one well connected person"
+    graph = nx.DiGraph()
+    graph.add_node("Funder", group="funder_name", size=100)
+    for index in range(3):
+        project = f"Project {index}"
+        graph.add_node(project, group="project_title", size=25)
+        graph.add_edge("Funder", project)
+        graph.add_node("Hub Person", group="person_name", size=10)
+        graph.add_edge("Hub Person", project)
+    graph.add_node("Leaf Person", group="person_name", size=10)
+    graph.add_edge("Leaf Person", "Project 0")
+    return graph
+
+class Testing(unittest.TestCase):
+    "Testing class for graph_metrics related tests"
+
+    def test_graph_hash_is_order_independent(self):
+        "The same structure hashes identically regardless of insertion order"
+        graph = build_example_graph()
+        reordered = nx.DiGraph()
+        reordered.add_edges_from(reversed(list(graph.edges())))
+        self.assertEqual(utils.graph_metrics.graph_hash(graph), utils.graph_metrics.graph_hash(reordered))
+        reordered.add_edge("Leaf Person", "Project 1")
+        self.assertNotEqual(utils.graph_metrics.graph_hash(graph), utils.graph_metrics.graph_hash(reordered))
+
+    def test_compute_graph_metrics(self):
+        "Every node receives each metric and the hub outranks the leaf"
+        graph = build_example_graph()
+        metrics = utils.graph_metrics.compute_graph_metrics(list(graph.nodes()), list(graph.edges()))
+        for name in ["degree", "pagerank", "betweenness", "community"]:
+            self.assertEqual(set(metrics[name]), set(graph.nodes()))
+        self.assertGreater(metrics["pagerank"]["Hub Person"], metrics["pagerank"]["Leaf Person"])
+        self.assertGreater(metrics["betweenness"]["Hub Person"], metrics["betweenness"]["Leaf Person"])
+
+    def test_filter_ordering_uses_pagerank(self):
+        "Filter options are ordered by PageRank when metrics are available"
+        graph = build_example_graph()
+        metrics = {"pagerank": {"Hub Person": 0.1, "Leaf Person": 0.9}}
+        annotated = utils.ukri_utils.annotate_networkx_data(graph, metrics)
+        ordered = sorted(annotated["person_name"].items(), key=utils.ukri_utils.node_rank_key, reverse=True)
+        self.assertEqual(ordered[0][1]["label"], "Leaf Person")
+        annotated = utils.ukri_utils.annotate_networkx_data(graph)
+        ordered = sorted(annotated["person_name"].items(), key=utils.ukri_utils.node_rank_key, reverse=True)
+        self.assertEqual(ordered[0][1]["label"], "Hub Person")
+
+    def test_annotate_centrality_on_graph(self):
+        "Only centrality sized groups are resized"
+        graph = build_example_graph()
+        metrics = {"pagerank": {"Funder": 1.0, "Hub Person": 0.5, "Leaf Person": 0.25}}
+        utils.graph_metrics.annotate_centrality_on_graph(graph, metrics)
+        self.assertEqual(graph.nodes["Funder"]["size"], 100)
+        self.assertGreater(graph.nodes["Hub Person"]["size"], graph.nodes["Leaf Person"]["size"])
+
+    def test_background_metrics(self):
+        "Metrics are computed in a spawned worker and reported ready once done"
+        graph = build_example_graph()
+        key = utils.graph_metrics.graph_hash(graph)
+        future = utils.graph_metrics.submit_graph_metrics(graph, key)
+        self.assertEqual(utils.graph_metrics.get_executor()._mp_context.get_start_method(), "spawn") # pylint: disable=protected-access
+        future.result(60)
+        self.assertTrue(utils.graph_metrics.metrics_ready(key))
+        self.assertFalse(utils.graph_metrics.metrics_pending(key))
+        self.assertEqual(utils.graph_metrics.get_graph_metrics(graph, key), future.result())
+        self.assertFalse(utils.graph_metrics.metrics_ready("unknown graph"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+"""Unit tests for the benchmark mock GtR server and fetch stages."""
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import benchmarks.mock_gtr_server # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import benchmarks.synthetic # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.config # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.ukri_utils # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+class Testing(unittest.TestCase):
+    "Testing class for the mock GtR server"
+
+    def setUp(self):
+        self.api_url = utils.config.GTR_API_URL
+
+    def tearDown(self):
+        utils.config.GTR_API_URL = self.api_url
+
+    def test_fetch_stages_against_mock_server(self):
+        "Search pagination and project lookups are served from the synthetic payload"
+        projects = benchmarks.synthetic.generate_projects(projects=250, people_per_project=2, funders=3)
+        with benchmarks.mock_gtr_server.serve(projects) as server:
+            utils.config.GTR_API_URL = server.api_url
+            results = utils.ukri_utils.search_ukri_paginate("term", 250)
+            data = utils.ukri_utils.parse_data(results)
+            lookup = utils.ukri_utils.get_project_data(data[:5])
+            self.assertEqual(server.request_counts, {"search": 3, "projects": 5})
+        self.assertEqual(results, projects)
+        self.assertEqual(len(data), 250)
+        self.assertEqual(sorted(lookup), sorted(row["project_grant_reference"] for row in data[:5]))
+
+if __name__ == "__main__":
+    unittest.main()
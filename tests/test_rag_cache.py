@@ -0,0 +1,109 @@
+"""Unit tests for the rag_cache module."""
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.rag_cache # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+class StubLLM: # pylint: disable=too-few-public-methods
+    "Stands in for a Graph RAG backend, counting calls and reporting fixed token usage"
+
+    def __init__(self):
+        self.calls = 0
+
+    def answer(self, question):
+        "Return an (answer, usage) pair like the Llama Index and Langchain helpers"
+        self.calls += 1
+        usage = {"model": "gpt-4", "prompt_tokens": 1000, "completion_tokens": 100}
+        return f"answer to {question}", usage
+
+class Testing(unittest.TestCase):
+    "Testing class for rag cache related tests"
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory() # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "rag_cache.sqlite3")
+        self.cache = utils.rag_cache.ResponseCache(self.path, max_entries=10, ttl_seconds=60)
+        self.llm = StubLLM()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def ask(self, question, graph_key="graph", history=None, usage=None, cache=None): # pylint: disable=too-many-arguments
+        "Answer through the cache with the stub LLM"
+        return utils.rag_cache.cached_answer(
+            question, graph_key, history or [], "stub",
+            lambda: self.llm.answer(question), session_usage=usage, cache=self.cache if cache is None else cache,
+        )
+
+    def test_repeated_question_hits_cache(self):
+        "Repeated and trivially different questions only call the LLM once"
+        first = self.ask("What projects are related to Leeds?")
+        self.assertEqual(self.ask("what projects are  related to leeds"), first)
+        self.assertEqual(self.llm.calls, 1)
+
+        reopened = utils.rag_cache.ResponseCache(self.path)
+        self.assertEqual(self.ask("What projects are related to Leeds?", cache=reopened), first)
+        self.assertEqual(self.llm.calls, 1)
+
+    def test_graph_and_history_are_part_of_the_key(self):
+        "A different graph or chat history is a miss"
+        self.ask("Who leads the project?")
+        self.ask("Who leads the project?", graph_key="other graph")
+        self.ask("Who leads the project?", history=[("Earlier question", "Earlier answer")])
+        self.assertEqual(self.llm.calls, 3)
+
+    def test_repeated_question_in_a_growing_chat_hits_cache(self):
+        "Asking again after the chat history has grown, as it does in the UI, is a hit"
+        history = []
+        for question in ["Who leads the project?", "What is the funding?", "who leads the project",
+                          "Who leads the project?", "What is the funding?"]:
+            history.append((question, self.ask(question, history=list(history))))
+        self.assertEqual(self.llm.calls, 2)
+        self.assertEqual(history[3][1], history[0][1])
+
+        self.ask("Who leads the project?", graph_key="other graph", history=history)
+        self.assertEqual(self.llm.calls, 3)
+
+    def test_eviction_and_ttl(self):
+        "Least recently used entries are evicted and expired entries are recomputed"
+        for index in range(12):
+            self.ask(f"question {index}")
+        self.assertEqual(len(self.cache), 10)
+        self.ask("question 0")
+        self.assertEqual(self.llm.calls, 13)
+
+        with mock.patch("time.time", return_value=10**10):
+            self.ask("question 11")
+        self.assertEqual(self.llm.calls, 14)
+
+    def test_usage_accounting(self):
+        "Tokens and cost are only added for answers that called the LLM"
+        usage = utils.rag_cache.new_usage()
+        self.ask("What is the funding?", usage=usage)
+        self.ask("What is the funding?", usage=usage)
+        self.assertEqual(usage["questions"], 2)
+        self.assertEqual(usage["cache_hits"], 1)
+        self.assertEqual(usage["prompt_tokens"], 1000)
+        self.assertEqual(usage["completion_tokens"], 100)
+        self.assertAlmostEqual(usage["estimated_cost"], 0.036)
+
+    def test_failed_answer_is_not_counted(self):
+        "A failed answer leaves the usage without questions and no summary until one succeeds"
+        usage = utils.rag_cache.new_usage()
+        answer = utils.rag_cache.cached_answer(
+            "Who leads the project?", "graph", [], "stub",
+            lambda: (None, {"model": "gpt-4", "prompt_tokens": 0, "completion_tokens": 0}),
+            session_usage=usage, cache=self.cache,
+        )
+        self.assertIsNone(answer)
+        self.assertEqual(usage["questions"], 0)
+        self.assertIsNone(utils.rag_cache.usage_summary(usage))
+        self.ask("Who leads the project?", usage=usage)
+        self.assertTrue(utils.rag_cache.usage_summary(usage).startswith("1 questions, 0 from cache"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Unit tests for the render_budget module."""
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import benchmarks.synthetic # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.render_budget as render_budget # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.ukri_utils # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+class Testing(unittest.TestCase):
+    "Testing class for render budget related tests"
+
+    def setUp(self):
+        render_budget._COSTS.clear() # pylint: disable=protected-access
+        self.data = utils.ukri_utils.parse_data(
+            benchmarks.synthetic.generate_projects(projects=300, people_per_project=3, funders=4, seed=3)
+        )
+        self.graph = utils.ukri_utils.create_networkx(self.data)
+
+    def test_estimate_matches_built_graph(self):
+        "The size estimated from records matches the graph and summary that are built"
+        estimate = render_budget.estimate_graph_size(self.data)
+        self.assertEqual(estimate, render_budget.graph_size(self.graph))
+        self.assertEqual(estimate["nodes"], self.graph.number_of_nodes())
+        summary = render_budget.summarize_graph(self.graph)
+        self.assertEqual(estimate["summary_nodes"], summary.number_of_nodes())
+        self.assertEqual(estimate["summary_edges"], summary.number_of_edges())
+        self.assertAlmostEqual(
+            sum(value for _, _, value in summary.edges(data="value")),
+            sum(row["value"] for row in self.data),
+        )
+
+    def test_choose_view(self):
+        "The full graph, the summary or a table is chosen as the size grows against the budget"
+        size = {"nodes": 100, "edges": 200, "summary_nodes": 10, "summary_edges": 20}
+        costs = render_budget.config.RENDER_STAGE_COSTS
+        per_element = sum(costs[stage] for stage in render_budget.RENDER_STAGES)
+        build = costs["create_networkx"]
+        self.assertEqual(render_budget.choose_view(size, budget=300 * (per_element + build)), render_budget.FULL)
+        self.assertEqual(render_budget.choose_view(size, budget=300 * build + 30 * per_element), render_budget.CLUSTERED)
+        self.assertEqual(render_budget.choose_view(size, budget=300 * build), render_budget.TABLE)
+        self.assertEqual(render_budget.choose_view(size, built=True, budget=300 * per_element), render_budget.FULL)
+
+    def test_measured_costs_replace_priors(self):
+        "Measured stage costs are smoothed and used for later choices"
+        render_budget.record_stage_cost("browser", 1.0, 1000)
+        self.assertEqual(render_budget.stage_cost("browser"), 1e-3)
+        render_budget.record_stage_cost("browser", 3.0, 1000)
+        smoothing = render_budget.config.RENDER_COST_SMOOTHING
+        self.assertAlmostEqual(render_budget.stage_cost("browser"), 1e-3 + smoothing * 2e-3)
+
+if __name__ == '__main__':
+    unittest.main()
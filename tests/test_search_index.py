@@ -0,0 +1,49 @@
+"""Unit tests for the search_index module."""
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.search_index # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+import utils.ukri_utils # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+def build_annotated_node_data():
+    "Annotated people, ranked by number of neighbors"
+    people = [("Jane Smith", 5), ("John Smithson", 9), ("Alice Jones", 7), ("Bob Smyth", 1)]
+    return {
+        "person_name": {
+            f"{name} ({neighbor_len})": {"label": name, "neighbor_len": neighbor_len}
+            for name, neighbor_len in people
+        }
+    }
+
+class Testing(unittest.TestCase):
+    "Testing class for search_index related tests"
+
+    def setUp(self):
+        self.index = utils.search_index.EntitySearchIndex(
+            build_annotated_node_data(), utils.ukri_utils.node_rank_key
+        )
+
+    def test_empty_query_returns_top_ranked(self):
+        "An empty query returns the highest ranked entities"
+        self.assertEqual(
+            self.index.search("person_name", "", 2), ["John Smithson (9)", "Alice Jones (7)"]
+        )
+
+    def test_prefix_matches_any_token(self):
+        "Prefix matches on any token are ranked by neighbors"
+        self.assertEqual(
+            self.index.search("person_name", "smi", 2), ["John Smithson (9)", "Jane Smith (5)"]
+        )
+        self.assertEqual(self.index.search("person_name", "JANE s", 5)[0], "Jane Smith (5)")
+
+    def test_fuzzy_matches_follow_prefix_matches(self):
+        "Misspellings fall back to trigram similarity after prefix matches"
+        result = self.index.search("person_name", "smyth", 5)
+        self.assertEqual(result[0], "Bob Smyth (1)")
+        self.assertIn("Jane Smith (5)", result)
+        self.assertNotIn("Alice Jones (7)", result)
+
+if __name__ == "__main__":
+    unittest.main()
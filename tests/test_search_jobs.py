@@ -0,0 +1,105 @@
+"""Unit tests for the search_jobs module."""
+import unittest
+import sys
+import os
+import threading
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.search_jobs as search_jobs # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+class StubFetch: # pylint: disable=too-few-public-methods
+    "Stands in for ukri_utils.fetch_search_data, blocking until released"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+
+    def __call__(self, search_term, number_of_results, attributes, cancelled):
+        self.calls.append(search_term)
+        self.started.set()
+        self.release.wait(5)
+        if cancelled():
+            return None
+        return [{"project_title": search_term, "value": number_of_results}]
+
+class Testing(unittest.TestCase):
+    "Testing class for search job related tests"
+
+    def setUp(self):
+        search_jobs.telemetry.reset()
+        self.directory = tempfile.TemporaryDirectory() # pylint: disable=consider-using-with
+        patcher = mock.patch.object(search_jobs.config, "EXPORT_DATASET_DIR", self.directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+        self.fetch = StubFetch()
+        self.runner = search_jobs.SearchJobRunner(self.fetch, workers=1, max_pending=2)
+
+    def tearDown(self):
+        self.fetch.release.set()
+        self.runner.executor.shutdown(wait=True)
+
+    @staticmethod
+    def wait(job):
+        "Wait for a job to finish"
+        if job.future:
+            job.future.result(5)
+
+    def test_job_completes_and_results_are_shared(self):
+        "Results can be polled once done and a repeat search is served from the cache"
+        job = self.runner.submit("user a", "Quantum", 100)
+        self.fetch.started.wait(5)
+        self.assertEqual(self.runner.status(job.job_id), search_jobs.RUNNING)
+        self.assertIsNone(self.runner.collect(job.job_id))
+        self.fetch.release.set()
+        self.wait(job)
+        self.assertEqual(self.runner.status(job.job_id), search_jobs.DONE)
+        self.assertEqual(self.runner.collect(job.job_id)[0]["project_title"], "Quantum")
+        self.assertEqual(search_jobs.telemetry.snapshot()["spans"]["search_ukri_workflow"]["count"], 1)
+        self.assertEqual(search_jobs.export.list_datasets()[0]["search_term"], "Quantum")
+
+        repeat = self.runner.submit("user b", "quantum ", 100)
+        self.assertEqual(self.runner.status(repeat.job_id), search_jobs.DONE)
+        self.assertEqual(self.fetch.calls, ["Quantum"])
+
+    def test_resubmit_cancels_superseded_search(self):
+        "A new search from the same user cancels the running and queued ones"
+        running = self.runner.submit("user a", "first", 100)
+        self.fetch.started.wait(5)
+        queued = self.runner.submit("user b", "other user", 100)
+        superseded = self.runner.submit("user b", "second", 100)
+        self.assertEqual(self.runner.status(queued.job_id), search_jobs.CANCELLED)
+
+        latest = self.runner.submit("user a", "third", 100)
+        self.assertEqual(self.runner.status(latest.job_id), search_jobs.REJECTED)
+        self.fetch.release.set()
+        self.wait(running)
+        self.wait(superseded)
+        self.assertEqual(self.runner.status(running.job_id), search_jobs.CANCELLED)
+        self.assertEqual(self.runner.status(superseded.job_id), search_jobs.DONE)
+        self.assertNotIn("other user", self.fetch.calls)
+
+    def test_results_survive_cache_eviction_until_collected(self):
+        "A finished job keeps its results when the shared cache evicts them, until collected"
+        job = self.runner.submit("user a", "Quantum", 100)
+        self.fetch.release.set()
+        self.wait(job)
+        self.runner.results.clear()
+        self.assertEqual(self.runner.collect(job.job_id)[0]["project_title"], "Quantum")
+        self.assertIsNone(self.runner.status(job.job_id))
+        self.assertIsNone(self.runner.collect(job.job_id))
+
+    def test_finished_jobs_are_not_kept_per_user(self):
+        "Only active searches are tracked per user, so collected results are released"
+        self.fetch.release.set()
+        for index in range(5):
+            job = self.runner.submit(f"user {index}", f"search {index}", 100)
+            self.wait(job)
+            self.assertEqual(self.runner.collect(job.job_id)[0]["project_title"], f"search {index}")
+        self.assertEqual((self.runner.jobs, self.runner.user_jobs), ({}, {}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,24 @@
+"""Unit tests for the app start up imports."""
+import unittest
+import sys
+import os
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+class Testing(unittest.TestCase):
+    "Testing class for start up related tests"
+
+    def test_heavy_backends_are_not_imported_at_start_up(self):
+        "Importing the app does not load the RAG or pyvis backends"
+        script = (
+            "import sys, main; "
+            "print([name for name in ('pyvis', 'llama_index', 'langchain', 'openai') if name in sys.modules])"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(output.strip(), "[]")
+
+if __name__ == '__main__':
+    unittest.main()
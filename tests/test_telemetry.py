@@ -0,0 +1,71 @@
+"""Unit tests for the telemetry module."""
+import unittest
+import sys
+import os
+import socket
+import urllib.request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.telemetry # pylint: disable=consider-using-from-import, import-error, wrong-import-position
+
+class Testing(unittest.TestCase):
+    "Testing class for telemetry related tests"
+
+    def setUp(self):
+        utils.telemetry.reset()
+
+    def test_span_records_duration_and_attributes(self):
+        "Spans aggregate counts, keep attributes and count errors"
+        with utils.telemetry.span("create_networkx", records=3) as attributes:
+            attributes["nodes"] = 7
+        with self.assertRaises(ValueError):
+            with utils.telemetry.span("create_networkx"):
+                raise ValueError("failed")
+        data = utils.telemetry.snapshot()
+        self.assertEqual(data["spans"]["create_networkx"]["count"], 2)
+        self.assertEqual(data["spans"]["create_networkx"]["errors"], 1)
+        self.assertEqual(data["recent_spans"][0]["nodes"], 7)
+        self.assertEqual(data["recent_spans"][0]["records"], 3)
+
+    def test_cache_hit_rates(self):
+        "Hit rates are computed per cache"
+        for hit in [True, True, False, True]:
+            utils.telemetry.record_cache("search_index", hit)
+        utils.telemetry.record_cache("graph_metrics", False)
+        self.assertEqual(utils.telemetry.cache_hit_rates(), {"search_index": 0.75, "graph_metrics": 0.0})
+
+    def test_prometheus_export(self):
+        "Spans, counters and gauges render in the text exposition format"
+        with utils.telemetry.span("render_graphs"):
+            pass
+        utils.telemetry.increment("gtr_requests_total", endpoint="search", status=200)
+        utils.telemetry.set_gauge("graph_nodes", 42)
+        text = utils.telemetry.render_prometheus()
+        self.assertIn('ukri_graph_span_seconds_count{span="render_graphs"} 1', text)
+        self.assertIn('ukri_graph_gtr_requests_total{endpoint="search",status="200"} 1', text)
+        self.assertIn("# TYPE ukri_graph_graph_nodes gauge\nukri_graph_graph_nodes 42", text)
+
+    @staticmethod
+    def stop_metrics_server():
+        "Shut down the shared metrics server so other tests start without one"
+        if server := utils.telemetry._METRICS_SERVER: # pylint: disable=protected-access
+            server.shutdown()
+            server.server_close()
+        utils.telemetry._METRICS_SERVER = None # pylint: disable=protected-access
+
+    def test_metrics_server(self):
+        "The optional endpoint serves the export on /metrics"
+        self.assertIsNone(utils.telemetry.start_metrics_server(port=0))
+        with socket.socket() as free_socket:
+            free_socket.bind(("127.0.0.1", 0))
+            port = free_socket.getsockname()[1]
+        server = utils.telemetry.start_metrics_server(port=port)
+        self.addCleanup(self.stop_metrics_server)
+        self.assertEqual(server.server_address[0], "127.0.0.1")
+        utils.telemetry.set_gauge("graph_edges", 5)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            self.assertIn("ukri_graph_graph_edges 5", response.read().decode("utf-8"))
+        self.assertIs(utils.telemetry.start_metrics_server(port=port), server)
+
+if __name__ == "__main__":
+    unittest.main()
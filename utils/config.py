@@ -4,8 +4,105 @@ import os
 
 DOCKER_RUNNING = os.environ.get("DOCKER_RUNNING", False)
 
+GTR_API_URL = os.environ.get("GTR_API_URL", "https://gtr.ukri.org/api")
+
+TELEMETRY_PREFIX = "ukri_graph"
+TELEMETRY_RECENT_SPANS = 200
+# High volume spans that are aggregated but not listed individually in the debug panel.
+TELEMETRY_DETAIL_SPANS = ["gtr_request"]
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+# Allows ?debug=1 to open the debug panel, it is never shown to visitors otherwise.
+DEBUG_PANEL = os.environ.get("DEBUG_PANEL", "false").lower() in ("1", "true", "yes")
+
 NODE_SIZE_SCALE_FACTOR = 10
 
+EXPORT_DATASET_DIR = os.environ.get("EXPORT_DATASET_DIR", "./output/datasets")
+EXPORT_SAVE_DATASETS = True
+EXPORT_MAX_DATASETS = int(os.environ.get("EXPORT_MAX_DATASETS", 50))
+EXPORT_CHUNK_SIZE = 10000
+EXPORT_PORT = int(os.environ.get("EXPORT_PORT", 8502))
+
+# Each result costs one GtR detail request, which the render latency budget does not include.
+MAX_NUMBER_OF_RESULTS = 5000
+RENDER_LATENCY_BUDGET_SECONDS = float(
+    os.environ.get("RENDER_LATENCY_BUDGET_SECONDS", 10)
+)
+# Seconds per node or edge used until a stage has been measured, the browser cost is never measured.
+RENDER_STAGE_COSTS = {
+    "create_networkx": 2e-5,
+    "convert_graph": 5e-5,
+    "render_graphs": 2e-5,
+    "browser": 1e-3,
+}
+RENDER_COST_SMOOTHING = 0.3
+
+SEARCH_JOB_WORKERS = int(os.environ.get("SEARCH_JOB_WORKERS", 4))
+SEARCH_JOB_MAX_PENDING = 32
+SEARCH_JOB_RETENTION_SECONDS = 10 * 60
+SEARCH_JOB_POLL_SECONDS = 1
+SEARCH_RESULT_CACHE_SIZE = 16
+
+# Off by default, the merge into one networkx graph runs in the parent so the
+# process pool has not beaten the serial build in benchmarks.bench_graph_build.
+PARALLEL_BUILD_THRESHOLD = int(os.environ.get("PARALLEL_BUILD_THRESHOLD", 0))
+GRAPH_BUILD_START_METHOD = os.environ.get("GRAPH_BUILD_START_METHOD", "spawn")
+GRAPH_BUILD_WORKERS = int(os.environ.get("GRAPH_BUILD_WORKERS", 0))
+GRAPH_BUILD_SHARDS_PER_WORKER = 4
+
+METRICS_WORKERS = int(os.environ.get("METRICS_WORKERS", 2))
+METRICS_START_METHOD = os.environ.get("METRICS_START_METHOD", "spawn")
+METRICS_POLL_SECONDS = 2
+METRICS_CACHE_SIZE = 32
+METRICS_SEED = 42
+METRICS_BETWEENNESS_SAMPLE_THRESHOLD = 500
+METRICS_BETWEENNESS_SAMPLES = 100
+
+CENTRALITY_SIZED_GROUPS = ["project_title", "person_name"]
+CENTRALITY_MIN_SIZE = 10
+CENTRALITY_SIZE_SCALE = 40
+
+ENTITY_NGRAM_SIZE = 3
+PERSON_MATCH_THRESHOLD = 0.85
+ORGANISATION_MATCH_THRESHOLD = 0.9
+
+TYPEAHEAD_LIMIT = 50
+TYPEAHEAD_FUZZY_THRESHOLD = 0.3
+TYPEAHEAD_CACHE_SIZE = 32
+
+# Graph RAG backends are imported on first use, see ui_utils.rag_backend.
+RAG_BACKEND_MODULES = {
+    "llama_index": "utils.llama_index_utils",
+    "langchain": "utils.langchain_utils",
+}
+LLAMA_INDEX_MODEL = "gpt-3.5-turbo"
+LANGCHAIN_MODEL = "gpt-4"
+# Dollars per 1k (prompt, completion) tokens, used to estimate session cost.
+RAG_MODEL_COSTS = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4": (0.03, 0.06),
+}
+GRAPH_CONTEXT_HOPS = 2
+GRAPH_CONTEXT_TOKEN_BUDGET = 2000
+GRAPH_CONTEXT_CHARS_PER_TOKEN = 4
+GRAPH_CONTEXT_MAX_NEIGHBORS = 25
+GRAPH_CONTEXT_MAX_NAME_TOKENS = 20
+GRAPH_CONTEXT_MATCH_THRESHOLD = 0.75
+GRAPH_CONTEXT_FALLBACK_ENTITIES = 5
+GRAPH_CONTEXT_CACHE_SIZE = 8
+# Edges with higher weights are kept first when the context is over budget.
+GRAPH_CONTEXT_ROLE_WEIGHTS = {
+    "PRINCIPAL_INVESTIGATOR": 4,
+    "FELLOW": 4,
+    "FUNDED": 3,
+    "RELATES TO": 3,
+    "CO_INVESTIGATOR": 2,
+}
+RAG_CACHE_PATH = os.environ.get("RAG_CACHE_PATH", "./output/rag_cache.sqlite3")
+RAG_CACHE_MAX_ENTRIES = 1000
+RAG_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+RAG_CACHE_HISTORY_TURNS = 3
+
 SAMPLE_QUESTIONS = [
     "What projects are related to [entity]",
     "What is the project with the most funding for [entity]",
@@ -0,0 +1,355 @@
+"""Utilities for resolving people and organisations across projects into canonical graph entities."""
+
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+
+
+def resource_id(resource_url):
+    """
+    Extract the GtR id from a resource url, e.g. http://gtr.ukri.org/api/person/<id>.
+    """
+    if not resource_url:
+        return None
+    return resource_url.rstrip("/").rsplit("/", 1)[-1].split("=")[-1] or None
+
+
+def normalize_name(name):
+    """
+    Normalize a display name for comparison, removing accents, case and punctuation.
+    """
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = re.sub(r"[^\w\s]", " ", name.lower())
+    return " ".join(name.split())
+
+
+def ngrams(text, size=config.ENTITY_NGRAM_SIZE):
+    """
+    Set of padded character n-grams for a normalized string.
+    """
+    padded = f"{' ' * (size - 1)}{text} "
+    return {padded[index : index + size] for index in range(len(padded) - size + 1)}
+
+
+class NGramIndex:
+    """
+    Inverted n-gram index returning similar strings without all-pairs comparison.
+    Searches use prefix filtering, only the rarest n-grams of the query are probed
+    since any match above the threshold must share at least one of them.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(list)
+        self.grams = {}
+
+    def add(self, key, text, grams=None):
+        """
+        Index text under key.
+        """
+        grams = grams or ngrams(text)
+        self.grams[key] = grams
+        for gram in grams:
+            self.postings[gram].append(key)
+
+    def search(self, text, threshold, grams=None, containment=False):
+        """
+        Return (key, jaccard similarity) pairs at or above the threshold, best first.
+        With containment the similarity is the share of the query n-grams found in the key.
+        """
+        grams = grams or ngrams(text)
+        probe_count = len(grams) - math.ceil(threshold * len(grams)) + 1
+        probe = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))
+        candidates = set()
+        for gram in probe[:probe_count]:
+            candidates.update(self.postings.get(gram, ()))
+        matches = []
+        for key in candidates:
+            shared = len(grams & self.grams[key])
+            if containment:
+                similarity = shared / len(grams)
+            else:
+                similarity = shared / (len(grams) + len(self.grams[key]) - shared)
+            if similarity >= threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda item: (-item[1], str(item[0])))
+
+
+class UnionFind:
+    """
+    Disjoint set used to cluster entity ids.
+    """
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, key):
+        """
+        Return the root of key, compressing the path.
+        """
+        self.parent.setdefault(key, key)
+        root = key
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[key] != root:
+            self.parent[key], key = root, self.parent[key]
+        return root
+
+    def union(self, key_a, key_b):
+        """
+        Merge the sets of two keys, the smallest root wins so results are deterministic.
+        """
+        root_a, root_b = sorted([self.find(key_a), self.find(key_b)])
+        self.parent[root_b] = root_a
+
+
+def entity_key(group, resource_url, name):
+    """
+    Key an entity on its GtR id, falling back to the normalized name when there is no link.
+    """
+    if entity_id := resource_id(resource_url):
+        return (group, entity_id)
+    return (group, f"name:{normalize_name(name)}")
+
+
+def person_block_key(name):
+    """
+    Surname and first name, used to match abbreviated first names.
+    """
+    tokens = normalize_name(name).split()
+    if not tokens:
+        return None, None
+    return tokens[-1], tokens[0]
+
+
+def compatible_first_names(first_name_a, first_name_b):
+    """
+    Check if two first names could be the same person, e.g. "j" and "jane".
+    """
+    return (
+        first_name_a == first_name_b
+        or (len(first_name_a) == 1 and first_name_b.startswith(first_name_a))
+        or (len(first_name_b) == 1 and first_name_a.startswith(first_name_b))
+    )
+
+
+def collect_entities(data):
+    """
+    Count display names per entity, the organisations each person worked with
+    and the people each person shared a project with.
+    """
+    names = defaultdict(Counter)
+    person_orgs = defaultdict(set)
+    collaborators = defaultdict(set)
+    for row in data:
+        funder_key = entity_key(
+            "funder_name", row.get("funder_link"), row.get("funder_name")
+        )
+        names[funder_key][row.get("funder_name")] += 1
+        org_key = entity_key(
+            "lead_research_organisation",
+            row.get("lead_research_organisation_link"),
+            row.get("lead_research_organisation"),
+        )
+        names[org_key][row.get("lead_research_organisation")] += 1
+        person_keys = set()
+        for person in row.get("people") or []:
+            if (person_name := person.get("fullName")) and person.get("resourceUrl"):
+                person_key = entity_key(
+                    "person_name", person.get("resourceUrl"), person_name
+                )
+                names[person_key][person_name] += 1
+                person_orgs[person_key].add(org_key)
+                person_keys.add(person_key)
+        for person_key in person_keys:
+            collaborators[person_key] |= person_keys - {person_key}
+    return names, person_orgs, collaborators
+
+
+def cluster_organisations(names, union_find):
+    """
+    Merge organisations with near identical normalized names.
+    """
+    index = NGramIndex()
+    for key in sorted(key for key in names if key[0] != "person_name"):
+        name = normalize_name(names[key].most_common(1)[0][0])
+        for match, _ in index.search(name, config.ORGANISATION_MATCH_THRESHOLD):
+            if match[0] == key[0]:
+                union_find.union(match, key)
+        index.add(key, name)
+
+
+class PersonClusters:
+    """
+    Evidence about each person cluster beyond the name, kept per union find root.
+    """
+
+    def __init__(self, union_find):
+        self.union_find = union_find
+        self.first_names = defaultdict(set)
+        self.members = defaultdict(set)
+        self.linked = defaultdict(set)
+        self.orgs = defaultdict(set)
+
+    def add(self, key, name, collaborators, orgs):
+        """
+        Start a cluster for a person id with its normalized name.
+        """
+        self.first_names[key].add(person_block_key(name)[1])
+        self.members[key].add(key)
+        self.linked[key] |= collaborators
+        self.orgs[key] |= orgs
+
+    def roots(self, keys):
+        """
+        Current cluster roots of keys.
+        """
+        return {self.union_find.find(key) for key in keys}
+
+    def compatible_roots(self, key, keys):
+        """
+        Clusters of keys other than the cluster of key whose first names all agree with it.
+        An initial only matches when every first name in the cluster agrees,
+        so "J Smith" does not join "John Smith" and "Jane Smith" together.
+        """
+        root = self.union_find.find(key)
+        return [
+            other_root
+            for other_root in sorted(self.roots(keys) - {root})
+            if all(
+                compatible_first_names(current, other)
+                for current in self.first_names[root]
+                for other in self.first_names[other_root]
+            )
+        ]
+
+    def related(self, key_a, key_b):
+        """
+        True when two different clusters may be one person. They must share a
+        collaborator or more than one organisation, and ids seen on the same
+        project are never the same person.
+        """
+        root_a, root_b = self.union_find.find(key_a), self.union_find.find(key_b)
+        if root_a == root_b or self.linked[root_a] & self.members[root_b]:
+            return False
+        shared_orgs = self.roots(self.orgs[root_a]) & self.roots(self.orgs[root_b])
+        return bool(
+            self.roots(self.linked[root_a]) & self.roots(self.linked[root_b])
+        ) or (len(shared_orgs) > 1)
+
+    def merge(self, key_a, key_b):
+        """
+        Merge two clusters and their evidence.
+        """
+        root_a, root_b = self.union_find.find(key_a), self.union_find.find(key_b)
+        self.union_find.union(key_a, key_b)
+        root = self.union_find.find(key_a)
+        for table in (self.first_names, self.members, self.linked, self.orgs):
+            table[root] = table.pop(root_a) | table.pop(root_b)
+
+
+def cluster_people(names, person_orgs, collaborators, union_find):
+    """
+    Merge spelling variants of people who share a lead organisation.
+    Each organisation is its own block so the comparison stays local.
+    """
+    indexes = defaultdict(NGramIndex)
+    surname_blocks = defaultdict(list)
+    clusters = PersonClusters(union_find)
+
+    for key in sorted(key for key in names if key[0] == "person_name"):
+        name = normalize_name(names[key].most_common(1)[0][0])
+        grams = ngrams(name)
+        surname = person_block_key(name)[0]
+        clusters.add(key, name, collaborators[key], person_orgs[key])
+        for org_key in sorted(clusters.roots(person_orgs[key])):
+            for match, _ in indexes[org_key].search(
+                name, config.PERSON_MATCH_THRESHOLD, grams
+            ):
+                if clusters.related(match, key):
+                    clusters.merge(match, key)
+            compatible = clusters.compatible_roots(
+                key, surname_blocks[(org_key, surname)]
+            )
+            if len(compatible) == 1 and clusters.related(compatible[0], key):
+                clusters.merge(compatible[0], key)
+            indexes[org_key].add(key, name, grams)
+            if surname:
+                surname_blocks[(org_key, surname)].append(key)
+
+
+def canonical_labels(names, union_find):
+    """
+    Choose a display label per cluster, disambiguating distinct entities sharing a name.
+    """
+    clusters = defaultdict(Counter)
+    for key, counter in names.items():
+        clusters[union_find.find(key)].update(counter)
+
+    by_label = defaultdict(list)
+    for root, counter in clusters.items():
+        label = sorted(counter.items(), key=lambda item: (-item[1], str(item[0])))[0][0]
+        by_label[(root[0], label)].append(root)
+
+    labels = {}
+    for (_, label), roots in by_label.items():
+        roots = sorted(roots, key=lambda root: (-sum(clusters[root].values()), root))
+        labels[roots[0]] = label
+        for root in roots[1:]:
+            labels[root] = f"{label} [{str(root[1])[:8]}]"
+    return {key: labels[union_find.find(key)] for key in names}
+
+
+def resolve_entities(data):
+    """
+    Rewrite funder, organisation and person names in parsed records to canonical labels.
+    Entities are keyed on GtR resource ids, spelling variants are merged and
+    different entities with the same name are kept apart.
+    """
+    names, person_orgs, collaborators = collect_entities(data)
+    union_find = UnionFind()
+    cluster_organisations(names, union_find)
+    cluster_people(names, person_orgs, collaborators, union_find)
+    labels = canonical_labels(names, union_find)
+
+    resolved = []
+    for row in data:
+        record = dict(row)
+        if label := labels.get(
+            entity_key("funder_name", row.get("funder_link"), row.get("funder_name"))
+        ):
+            record["funder_name"] = label
+        if label := labels.get(
+            entity_key(
+                "lead_research_organisation",
+                row.get("lead_research_organisation_link"),
+                row.get("lead_research_organisation"),
+            )
+        ):
+            record["lead_research_organisation"] = label
+        if people := row.get("people"):
+            record["people"] = [
+                (
+                    {**person, "fullName": label}
+                    if person.get("resourceUrl")
+                    and (
+                        label := labels.get(
+                            entity_key(
+                                "person_name",
+                                person.get("resourceUrl"),
+                                person.get("fullName"),
+                            )
+                        )
+                    )
+                    else person
+                )
+                for person in people
+            ]
+        resolved.append(record)
+    return resolved
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,401 @@
+"""Utilities for saving search results and streaming them out as Parquet, Arrow or compressed CSV.
+
+Usage: python -m utils.export list
+       python -m utils.export export <dataset> --table nodes --format parquet --output nodes.parquet
+       python -m utils.export serve --port 8502
+"""
+
+import argparse
+import contextlib
+import csv
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.entity_resolution as entity_resolution  # pylint: disable=consider-using-from-import, import-error
+import utils.graph_context as graph_context  # pylint: disable=consider-using-from-import, import-error
+
+# Column name and Arrow type name of every exported table.
+TABLES = {
+    "records": [
+        ("project_grant_reference", "string"),
+        ("project_title", "string"),
+        ("project_url", "string"),
+        ("funder_name", "string"),
+        ("funder_link", "string"),
+        ("value", "float64"),
+        ("lead_research_organisation", "string"),
+        ("lead_research_organisation_link", "string"),
+        ("people", "string"),
+    ],
+    "nodes": [
+        ("node", "string"),
+        ("group", "string"),
+        ("funding", "float64"),
+        ("size", "float64"),
+        ("degree", "int64"),
+    ],
+    "edges": [
+        ("source", "string"),
+        ("target", "string"),
+        ("role", "string"),
+        ("label", "string"),
+        ("value", "float64"),
+    ],
+}
+FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "csv.gz": "application/gzip",
+}
+
+
+def dataset_id(search_term, number_of_results):
+    """
+    Stable id of the saved results of a search.
+    """
+    key = json.dumps([entity_resolution.normalize_name(search_term), number_of_results])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def dataset_paths(identifier, directory=None):
+    """
+    Records and metadata file paths of a saved dataset.
+    """
+    directory = directory or config.EXPORT_DATASET_DIR
+    return (
+        os.path.join(directory, f"{identifier}.jsonl.gz"),
+        os.path.join(directory, f"{identifier}.meta.json"),
+    )
+
+
+@contextlib.contextmanager
+def replaced_on_close(path):
+    """
+    Binary file written under a unique temporary name next to path and moved into place
+    once complete, so concurrent writers of the same path never share a partial file.
+    """
+    temp_file = tempfile.NamedTemporaryFile(  # pylint: disable=consider-using-with
+        "wb",
+        dir=os.path.dirname(path),
+        prefix=f"{os.path.basename(path)}.",
+        suffix=".tmp",
+        delete=False,
+    )
+    try:
+        with temp_file:
+            yield temp_file
+        os.replace(temp_file.name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_file.name)
+        raise
+
+
+def save_dataset(
+    search_term, number_of_results, data, directory=None, max_datasets=None
+):
+    """
+    Save parsed records as gzipped JSON lines, one record at a time, with a metadata file.
+    Both files are written to unique temporary files and moved into place, then the oldest
+    datasets above max_datasets are removed.
+    """
+    identifier = dataset_id(search_term, number_of_results)
+    records_path, meta_path = dataset_paths(identifier, directory)
+    os.makedirs(os.path.dirname(records_path), exist_ok=True)
+    with replaced_on_close(records_path) as temp_file, gzip.open(
+        temp_file, "wt", encoding="utf-8"
+    ) as records_file:
+        for row in data:
+            records_file.write(json.dumps(row) + "\n")
+    with replaced_on_close(meta_path) as temp_file, io.TextIOWrapper(
+        temp_file, encoding="utf-8"
+    ) as meta_file:
+        json.dump(
+            {
+                "id": identifier,
+                "search_term": search_term,
+                "number_of_results": number_of_results,
+                "records": len(data),
+                "created": time.time(),
+            },
+            meta_file,
+        )
+    prune_datasets(directory, max_datasets)
+    return identifier
+
+
+def prune_datasets(directory=None, max_datasets=None):
+    """
+    Remove the oldest saved datasets so at most max_datasets are kept.
+    """
+    max_datasets = config.EXPORT_MAX_DATASETS if max_datasets is None else max_datasets
+    for dataset in list_datasets(directory)[max_datasets:]:
+        for path in dataset_paths(dataset["id"], directory):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def list_datasets(directory=None):
+    """
+    Metadata of every saved dataset, newest first.
+    """
+    directory = directory or config.EXPORT_DATASET_DIR
+    if not os.path.isdir(directory):
+        return []
+    datasets = []
+    for file_name in os.listdir(directory):
+        if file_name.endswith(".meta.json"):
+            try:
+                with open(
+                    os.path.join(directory, file_name), "r", encoding="utf-8"
+                ) as meta:
+                    datasets.append(json.load(meta))
+            except FileNotFoundError:
+                # Removed by a concurrent prune.
+                continue
+    return sorted(datasets, key=lambda dataset: dataset["created"], reverse=True)
+
+
+def iter_dataset(identifier, directory=None):
+    """
+    Stream the records of a saved dataset.
+    """
+    records_path, _ = dataset_paths(identifier, directory)
+    with gzip.open(records_path, "rt", encoding="utf-8") as records_file:
+        for line in records_file:
+            yield json.loads(line)
+
+
+def iter_record_rows(data):
+    """
+    Flat rows of parsed records, people are kept as a JSON list.
+    """
+    for row in data:
+        yield {
+            **{column: row.get(column) for column, _ in TABLES["records"]},
+            "people": json.dumps(row.get("people") or []),
+        }
+
+
+def iter_node_rows(graph):
+    """
+    Rows of graph nodes.
+    """
+    for node, data in graph.nodes(data=True):
+        yield {
+            "node": str(node),
+            "group": data.get("group"),
+            "funding": data.get("funding"),
+            "size": data.get("size"),
+            "degree": graph.degree(node),
+        }
+
+
+def iter_edge_rows(graph):
+    """
+    Rows of graph edges.
+    """
+    for source, target, data in graph.edges(data=True):
+        yield {
+            "source": str(source),
+            "target": str(target),
+            "role": graph_context.edge_role(data),
+            "label": data.get("label"),
+            "value": data.get("value"),
+        }
+
+
+def iter_table_rows(table, data):
+    """
+    Rows of a table from records, the graph is only built for node and edge tables.
+    """
+    if table == "records":
+        return iter_record_rows(data)
+    import utils.graph_builder as graph_builder  # pylint: disable=consider-using-from-import, import-error, import-outside-toplevel
+
+    graph = graph_builder.build_graph(list(data))
+    return iter_node_rows(graph) if table == "nodes" else iter_edge_rows(graph)
+
+
+def iter_chunks(rows, chunk_size):
+    """
+    Lists of up to chunk_size rows.
+    """
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        yield chunk
+
+
+def arrow_schema(table):
+    """
+    Arrow schema of a table.
+    """
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+
+    return pa.schema(
+        [(column, getattr(pa, type_name)()) for column, type_name in TABLES[table]]
+    )
+
+
+def write_table(table, rows, output, file_format, chunk_size=None):
+    """
+    Write rows to a binary file object one chunk at a time, so memory use does not grow with the table.
+    Returns the number of rows written.
+    """
+    chunk_size = chunk_size or config.EXPORT_CHUNK_SIZE
+    columns = [column for column, _ in TABLES[table]]
+    count = 0
+    if file_format == "csv.gz":
+        with gzip.GzipFile(fileobj=output, mode="wb") as compressed:
+            with io.TextIOWrapper(compressed, encoding="utf-8", newline="") as text:
+                writer = csv.DictWriter(text, fieldnames=columns)
+                writer.writeheader()
+                for chunk in iter_chunks(rows, chunk_size):
+                    writer.writerows(chunk)
+                    count += len(chunk)
+        return count
+
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    schema = arrow_schema(table)
+    sink = pa.PythonFile(output, mode="w")
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    elif file_format == "arrow":
+        writer = pa.ipc.new_stream(sink, schema)
+    else:
+        raise ValueError(f"Unknown export format: {file_format}")
+    with writer:
+        for chunk in iter_chunks(rows, chunk_size):
+            writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+            count += len(chunk)
+    return count
+
+
+def export_dataset(identifier, table, file_format, output, directory=None):
+    """
+    Export one table of a saved dataset to a binary file object.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Unknown export table: {table}")
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    rows = iter_table_rows(table, iter_dataset(identifier, directory))
+    return write_table(table, rows, output, file_format)
+
+
+class ExportHandler(BaseHTTPRequestHandler):
+    """
+    Serve /datasets and /datasets/<id>/<table>.<format> from the saved datasets.
+    """
+
+    directory = None
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        List datasets or stream an export.
+        """
+        parts = [
+            part for part in urllib.parse.urlparse(self.path).path.split("/") if part
+        ]
+        if parts == ["datasets"]:
+            body = json.dumps(list_datasets(self.directory)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if len(parts) == 3 and parts[0] == "datasets":
+            identifier, (table, _, file_format) = parts[1], parts[2].partition(".")
+            records_path, _ = dataset_paths(identifier, self.directory)
+            if (
+                table in TABLES
+                and file_format in FORMATS
+                and os.path.exists(records_path)
+            ):
+                self.send_response(200)
+                self.send_header("Content-Type", FORMATS[file_format])
+                self.send_header(
+                    "Content-Disposition",
+                    f'attachment; filename="{identifier}_{parts[2]}"',
+                )
+                self.end_headers()
+                try:
+                    export_dataset(
+                        identifier, table, file_format, self.wfile, self.directory
+                    )
+                except Exception as error:  # pylint: disable=broad-except
+                    logging.exception("ERROR export: %s", error)
+                return
+        self.send_response(404)
+        self.end_headers()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Silence per request logging.
+        """
+
+
+def create_export_server(port=None, directory=None, host="127.0.0.1"):
+    """
+    HTTP server for exports, bound to localhost by default.
+    """
+    handler = type("BoundExportHandler", (ExportHandler,), {"directory": directory})
+    return ThreadingHTTPServer(
+        (host, config.EXPORT_PORT if port is None else port), handler
+    )
+
+
+def main():
+    """
+    List, export or serve saved datasets without starting the Streamlit UI.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--directory", default=config.EXPORT_DATASET_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List saved datasets.")
+    export_parser = commands.add_parser("export", help="Export a dataset table.")
+    export_parser.add_argument("dataset")
+    export_parser.add_argument("--table", choices=list(TABLES), default="records")
+    export_parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    export_parser.add_argument("--output", required=True)
+    serve_parser = commands.add_parser("serve", help="Serve exports over HTTP.")
+    serve_parser.add_argument("--port", type=int, default=config.EXPORT_PORT)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for dataset in list_datasets(args.directory):
+            print(
+                f"{dataset['id']}  {dataset['records']:>7} records  "
+                f"{dataset['search_term']!r} ({dataset['number_of_results']})"
+            )
+    elif args.command == "export":
+        with open(args.output, "wb") as output:
+            count = export_dataset(
+                args.dataset, args.table, args.format, output, args.directory
+            )
+        print(f"Wrote {count} {args.table} rows to {args.output}")
+    else:
+        server = create_export_server(args.port, args.directory, args.host)
+        print(
+            f"Serving exports on http://{args.host}:{server.server_address[1]}/datasets"
+        )
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Utilities for building the funding graph, optionally over a process pool for very large result sets."""
+
+import concurrent.futures
+import contextlib
+import gc
+import multiprocessing
+import os
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.ukri_utils as ukri_utils  # pylint: disable=consider-using-from-import, import-error
+import utils.render_budget as render_budget  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
+
+# Records of the pool a worker process belongs to, set by the pool initializer.
+_WORKER_ROWS = []
+
+
+def init_worker(rows):
+    """
+    Pool initializer keeping the records in the worker, each pool carries the records of its own call.
+    """
+    global _WORKER_ROWS  # pylint: disable=global-statement
+    _WORKER_ROWS = rows
+
+
+def build_worker_partial_tables(bounds):
+    """
+    Worker entry point building the tables of one shard of the pool's records.
+    """
+    start, end = bounds
+    with gc_paused():
+        return ukri_utils.build_partial_tables(_WORKER_ROWS[start:end])
+
+
+def shard_bounds(length, shard_count):
+    """
+    Contiguous (start, end) ranges so the merge can preserve record order.
+    """
+    shard_size = max(1, -(-length // max(1, shard_count)))
+    return [
+        (start, min(start + shard_size, length))
+        for start in range(0, length, shard_size)
+    ]
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """
+    Pause the cyclic garbage collector while allocating large numbers of containers.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def create_networkx_parallel(data, workers=None, shard_count=None):
+    """
+    Create networkx graph from UKRI data using a process pool over record shards.
+    The graph rules live in ukri_utils.build_partial_tables, shared with the serial builder.
+    """
+    workers = workers or config.GRAPH_BUILD_WORKERS or os.cpu_count()
+    shard_count = shard_count or workers * config.GRAPH_BUILD_SHARDS_PER_WORKER
+    bounds = shard_bounds(len(data), shard_count)
+
+    # Workers are spawned rather than forked from threaded servers, so the records
+    # are pickled once per worker and the lookups, restored on merge, are left out.
+    rows = [
+        {key: value for key, value in row.items() if key != "project_data_lookup"}
+        for row in data
+    ]
+    with concurrent.futures.ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context(config.GRAPH_BUILD_START_METHOD),
+        initializer=init_worker,
+        initargs=(rows,),
+    ) as executor:
+        partial_tables = list(executor.map(build_worker_partial_tables, bounds))
+    with gc_paused():
+        return ukri_utils.merge_partial_tables(
+            partial_tables, ukri_utils.first_project_data_lookup(data)
+        )
+
+
+def build_graph(data):
+    """
+    Create networkx graph from UKRI data. The process pool is only used when
+    PARALLEL_BUILD_THRESHOLD is set, the result set reaches it and there is more than one core.
+    """
+    workers = config.GRAPH_BUILD_WORKERS or os.cpu_count() or 1
+    parallel = 0 < config.PARALLEL_BUILD_THRESHOLD <= len(data) and workers > 1
+    with render_budget.measure(
+        "create_networkx", records=len(data), parallel=parallel
+    ) as attributes:
+        if parallel:
+            graph = create_networkx_parallel(data, workers)
+        else:
+            with gc_paused():
+                graph = ukri_utils.create_networkx(data)
+        attributes.update(nodes=graph.number_of_nodes(), edges=graph.number_of_edges())
+    telemetry.set_gauge("graph_nodes", graph.number_of_nodes())
+    telemetry.set_gauge("graph_edges", graph.number_of_edges())
+    return graph
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,204 @@
+"""Utilities for selecting a bounded, question specific subgraph as Graph RAG context."""
+
+import heapq
+import math
+import threading
+from collections import OrderedDict
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.entity_resolution as entity_resolution  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
+
+_INDEX_CACHE = OrderedDict()
+_INDEX_LOCK = threading.Lock()
+
+
+def estimate_tokens(text):
+    """
+    Rough token count for budgeting, about four characters per token for English text.
+    """
+    return math.ceil(len(text) / config.GRAPH_CONTEXT_CHARS_PER_TOKEN)
+
+
+def edge_role(data):
+    """
+    Role of an edge, funding edges carry a value and the rest a role title.
+    """
+    if data.get("value") is not None:
+        return "FUNDED"
+    return data.get("title") or "RELATES TO"
+
+
+def edge_predicate(data):
+    """
+    Predicate used for the edge in a knowledge triple.
+    """
+    return data.get("label", "relates to")
+
+
+class GraphContextIndex:
+    """
+    Name lookup and ranked adjacency over one graph, built once and shared by every question.
+    Neighbour rankings are computed on first visit so a question only pays for the nodes it reaches.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.names = {}
+        self.max_name_tokens = 1
+        for node in graph:
+            if name := entity_resolution.normalize_name(str(node)):
+                self.names.setdefault(name, []).append(node)
+                self.max_name_tokens = max(self.max_name_tokens, len(name.split()))
+        self.max_name_tokens = min(
+            self.max_name_tokens, config.GRAPH_CONTEXT_MAX_NAME_TOKENS
+        )
+        # Questions naming no entity fall back to the best funded nodes.
+        self.top_funded = heapq.nlargest(
+            config.GRAPH_CONTEXT_FALLBACK_ENTITIES,
+            graph,
+            key=lambda node: graph.nodes[node].get("funding") or 0,
+        )
+        self.trigram_index = None
+        self.ranked_neighbors = {}
+        self.lock = threading.Lock()
+
+    def fuzzy_matches(self, phrase):
+        """
+        Node names similar to a phrase of the question, the trigram index is built on first use.
+        """
+        with self.lock:
+            if self.trigram_index is None:
+                self.trigram_index = entity_resolution.NGramIndex()
+                for name in self.names:
+                    self.trigram_index.add(name, name)
+        return self.trigram_index.search(phrase, config.GRAPH_CONTEXT_MATCH_THRESHOLD)
+
+    def find_entities(self, question):
+        """
+        Nodes named in the question. Every run of up to max_name_tokens words is looked up,
+        so the cost depends on the question length rather than the graph size.
+        Longer phrases win and the words they cover are not matched again.
+        """
+        tokens = entity_resolution.normalize_name(question).split()
+        phrases = [
+            (length, start)
+            for length in range(min(self.max_name_tokens, len(tokens)), 0, -1)
+            for start in range(len(tokens) - length + 1)
+        ]
+        entities, covered = [], set()
+        for exact in [True, False]:
+            for length, start in phrases:
+                span = set(range(start, start + length))
+                if span & covered or (not exact and length < 2):
+                    continue
+                phrase = " ".join(tokens[start : start + length])
+                if exact:
+                    names = [phrase] if phrase in self.names else []
+                else:
+                    names = [name for name, _ in self.fuzzy_matches(phrase)[:1]]
+                for name in names:
+                    entities.extend(self.names[name])
+                    covered |= span
+            if entities:
+                break
+        return list(dict.fromkeys(entities))
+
+    def neighbors(self, node):
+        """
+        Edges of a node in either direction, best first by role weight then funding.
+        """
+        with self.lock:
+            if node in self.ranked_neighbors:
+                return self.ranked_neighbors[node]
+        edges = [
+            (node, neighbor, data) for neighbor, data in self.graph.succ[node].items()
+        ] + [(neighbor, node, data) for neighbor, data in self.graph.pred[node].items()]
+
+        def rank(edge):
+            subject, object_, data = edge
+            other = object_ if subject == node else subject
+            return (
+                config.GRAPH_CONTEXT_ROLE_WEIGHTS.get(edge_role(data), 1),
+                self.graph.nodes[other].get("funding") or 0,
+            )
+
+        ranked = heapq.nlargest(config.GRAPH_CONTEXT_MAX_NEIGHBORS, edges, key=rank)
+        with self.lock:
+            self.ranked_neighbors[node] = ranked
+        return ranked
+
+    def extract(
+        self,
+        question,
+        hops=config.GRAPH_CONTEXT_HOPS,
+        token_budget=config.GRAPH_CONTEXT_TOKEN_BUDGET,
+    ):
+        """
+        Return the entities found and the (subject, predicate, object) triples around them.
+        Edges are taken nearest hop first, then by role weight and funding, until the token budget is spent.
+        """
+        entities = self.find_entities(question) or self.top_funded
+        visited = set(entities)
+        frontier = entities
+        triples, seen_edges, tokens = [], set(), 0
+        for _ in range(hops):
+            next_frontier = []
+            for edge in self.hop_edges(frontier, seen_edges):
+                triple = (str(edge[0]), edge_predicate(edge[2]), str(edge[1]))
+                tokens += estimate_tokens(" ".join(triple))
+                if tokens > token_budget:
+                    return entities, triples
+                triples.append(triple)
+                for node in edge[:2]:
+                    if node not in visited:
+                        visited.add(node)
+                        next_frontier.append(node)
+            frontier = next_frontier
+        return entities, triples
+
+    def hop_edges(self, frontier, seen_edges):
+        """
+        Unseen (subject, object, data) edges around the frontier, best ranked first.
+        """
+        candidates = []
+        for node in frontier:
+            for rank, (subject, object_, data) in enumerate(self.neighbors(node)):
+                if (subject, object_) not in seen_edges:
+                    seen_edges.add((subject, object_))
+                    candidates.append((rank, subject, object_, data))
+        return [
+            (subject, object_, data)
+            for _, subject, object_, data in sorted(
+                candidates, key=lambda item: item[0]
+            )
+        ]
+
+
+def get_context_index(key, graph):
+    """
+    Return the context index for a graph, building it once per key.
+    """
+    with _INDEX_LOCK:
+        telemetry.record_cache("graph_context", key in _INDEX_CACHE)
+        if key in _INDEX_CACHE:
+            _INDEX_CACHE.move_to_end(key)
+            return _INDEX_CACHE[key]
+        index = GraphContextIndex(graph)
+        _INDEX_CACHE[key] = index
+        while len(_INDEX_CACHE) > config.GRAPH_CONTEXT_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+        return index
+
+
+def extract_question_context(graph, key, question):
+    """
+    Knowledge triples relevant to a question, bounded by hops and the token budget.
+    """
+    with telemetry.span("graph_context") as attributes:
+        entities, triples = get_context_index(key, graph).extract(question)
+        attributes.update(entities=len(entities), triples=len(triples))
+    return entities, triples
+
+
+if __name__ == "__main__":
+    pass
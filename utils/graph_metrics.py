@@ -0,0 +1,186 @@
+"""Utilities for computing centrality and community metrics on the funding graph in the background."""
+
+import concurrent.futures
+import hashlib
+import logging
+import math
+import multiprocessing
+import threading
+from collections import OrderedDict
+import networkx as nx
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+_METRICS_FUTURES = OrderedDict()
+_METRICS_LOCK = threading.Lock()
+
+
+def graph_hash(graph):
+    """
+    Stable hash of the graph structure, used as a cache key for derived data.
+    """
+    digest = hashlib.sha1()
+    for node in sorted(str(node) for node in graph.nodes()):
+        digest.update(node.encode("utf-8"))
+        digest.update(b"\x00")
+    digest.update(b"\x01")
+    for source, target in sorted((str(u), str(v)) for u, v in graph.edges()):
+        digest.update(source.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(target.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def pagerank_power_iteration(graph, alpha=0.85, max_iter=100, tol=1.0e-6):
+    """
+    PageRank on an undirected graph by power iteration.
+    nx.pagerank requires scipy, which is not a dependency of this project.
+    """
+    number_of_nodes = graph.number_of_nodes()
+    ranks = dict.fromkeys(graph, 1.0 / number_of_nodes)
+    degree = dict(graph.degree())
+    for _ in range(max_iter):
+        dangling = alpha * sum(ranks[node] for node in graph if not degree[node])
+        base = (1.0 - alpha + dangling) / number_of_nodes
+        next_ranks = {
+            node: base
+            + alpha
+            * sum(ranks[neighbor] / degree[neighbor] for neighbor in graph[node])
+            for node in graph
+        }
+        error = sum(abs(next_ranks[node] - ranks[node]) for node in graph)
+        ranks = next_ranks
+        if error < number_of_nodes * tol:
+            break
+    return ranks
+
+
+def compute_graph_metrics(nodes, edges, seed=config.METRICS_SEED):
+    """
+    Compute degree, PageRank, betweenness and community membership for a graph.
+    Betweenness is approximated by sampling source nodes on large graphs.
+    """
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(edges)
+
+    if not graph.number_of_nodes():
+        return {"degree": {}, "pagerank": {}, "betweenness": {}, "community": {}}
+
+    degree = nx.degree_centrality(graph)
+    pagerank = pagerank_power_iteration(graph)
+
+    sample_size = None
+    if graph.number_of_nodes() > config.METRICS_BETWEENNESS_SAMPLE_THRESHOLD:
+        sample_size = config.METRICS_BETWEENNESS_SAMPLES
+    betweenness = nx.betweenness_centrality(graph, k=sample_size, seed=seed)
+
+    communities = nx.community.louvain_communities(graph, seed=seed)
+    ordered_communities = sorted(communities, key=len, reverse=True)
+    community = {
+        node: index
+        for index, members in enumerate(ordered_communities)
+        for node in members
+    }
+
+    return {
+        "degree": degree,
+        "pagerank": pagerank,
+        "betweenness": betweenness,
+        "community": community,
+    }
+
+
+def get_executor():
+    """
+    Lazily create the process pool used for metric computation. Workers are spawned
+    rather than forked from the threaded Streamlit server.
+    """
+    global _EXECUTOR  # pylint: disable=global-statement
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = concurrent.futures.ProcessPoolExecutor(  # pylint: disable=consider-using-with
+                config.METRICS_WORKERS,
+                mp_context=multiprocessing.get_context(config.METRICS_START_METHOD),
+            )
+        return _EXECUTOR
+
+
+def submit_graph_metrics(graph, key=None):
+    """
+    Schedule metric computation for a graph, reusing any existing job for the same graph hash.
+    """
+    key = key or graph_hash(graph)
+    with _METRICS_LOCK:
+        telemetry.record_cache("graph_metrics", key in _METRICS_FUTURES)
+        if key in _METRICS_FUTURES:
+            _METRICS_FUTURES.move_to_end(key)
+            return _METRICS_FUTURES[key]
+
+        # Only the structure is sent to the worker, not the node payloads.
+        future = get_executor().submit(
+            compute_graph_metrics, list(graph.nodes()), list(graph.edges())
+        )
+        _METRICS_FUTURES[key] = future
+        while len(_METRICS_FUTURES) > config.METRICS_CACHE_SIZE:
+            _METRICS_FUTURES.popitem(last=False)
+        return future
+
+
+def get_graph_metrics(graph, key=None):
+    """
+    Return cached metrics for the graph if they are ready, otherwise schedule them and return None.
+    """
+    key = key or graph_hash(graph)
+    future = submit_graph_metrics(graph, key)
+    if not future.done():
+        return None
+    try:
+        return future.result()
+    except Exception as error:
+        logging.exception("ERROR get_graph_metrics: %s", error)
+        with _METRICS_LOCK:
+            _METRICS_FUTURES.pop(key, None)
+    return None
+
+
+def metrics_ready(key):
+    """
+    True once the metrics scheduled under key have been computed successfully.
+    """
+    with _METRICS_LOCK:
+        future = _METRICS_FUTURES.get(key)
+    return bool(future and future.done() and not future.exception())
+
+
+def metrics_pending(key):
+    """
+    True while the metrics scheduled under key are still being computed.
+    """
+    with _METRICS_LOCK:
+        future = _METRICS_FUTURES.get(key)
+    return bool(future and not future.done())
+
+
+def annotate_centrality_on_graph(graph, metrics):
+    """
+    Size nodes that are not sized by funding using normalized PageRank.
+    """
+    if not metrics or not (pagerank := metrics.get("pagerank")):
+        return
+    max_pagerank = max(pagerank.values()) or 1.0
+    sizes = {
+        node_label: config.CENTRALITY_MIN_SIZE
+        + math.ceil(config.CENTRALITY_SIZE_SCALE * score / max_pagerank)
+        for node_label, data in graph.nodes(data=True)
+        if (data.get("group") in config.CENTRALITY_SIZED_GROUPS)
+        and ((score := pagerank.get(node_label)) is not None)
+    }
+    nx.set_node_attributes(graph, sizes, "size")
+
+
+if __name__ == "__main__":
+    pass
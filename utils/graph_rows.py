@@ -0,0 +1,29 @@
+"""Utilities for reading the graph entities out of UKRI records, shared by every graph builder."""
+
+
+def iter_graph_rows(data):
+    """
+    Complete records with the names that become graph nodes, as
+    (row, funder_name, project_title, lead_research_organisation, people) where
+    people holds (person_name, person_link, roles) for every person with a role.
+    Incomplete records are skipped rather than reusing names from the previous record.
+    """
+    for row in data:
+        if not (
+            (funder_name := row.get("funder_name"))
+            and (project_title := row.get("project_title"))
+            and (lead_research_organisation := row.get("lead_research_organisation"))
+        ):
+            continue
+        people = [
+            (person_name, person_link, roles)
+            for person in row.get("people") or []
+            if (person_name := person.get("fullName"))
+            and (person_link := person.get("resourceUrl"))
+            and (roles := person.get("roles"))
+        ]
+        yield row, funder_name, project_title, lead_research_organisation, people
+
+
+if __name__ == "__main__":
+    pass
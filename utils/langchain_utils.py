@@ -1,33 +1,53 @@
 """Utilities for interacting with Langchain for Graph RAG."""
 
+from langchain_community.callbacks.manager import get_openai_callback
 from langchain_community.chains.graph_qa.base import GraphQAChain
 from langchain_community.graphs import NetworkxEntityGraph
 from langchain_community.graphs.networkx_graph import KnowledgeTriple
 from langchain_openai import ChatOpenAI
-import utils.ui_utils as ui_utils  # pylint: disable=consider-using-from-import, import-error
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.graph_context as graph_context  # pylint: disable=consider-using-from-import, import-error
+import utils.graph_metrics as graph_metrics  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
 
 
-def construct_graph_langchain(graph_nx, open_ai_api_key, question):
+@telemetry.timed()
+def construct_graph_langchain(graph_nx, open_ai_api_key, question, graph_key=None):
     """
-    Construct a knowledge graph in Langchain and preform graph RAG.
+    Construct a knowledge graph in Langchain from the subgraph around the entities
+    in the question and preform graph RAG.
+    Returns the answer and the token usage of the call.
     """
+    if graph_key is None:
+        graph_key = graph_metrics.graph_hash(graph_nx)
+    entities, triples = graph_context.extract_question_context(
+        graph_nx, graph_key, question
+    )
     graph = NetworkxEntityGraph()
-    for node in graph_nx:
-        graph.add_node(node)
+    for node in entities:
+        graph.add_node(str(node))
 
-    for subject_entity, object_entity in graph_nx.edges():
-        predicate = graph_nx[subject_entity][object_entity].get("label", "relates to")
-        graph.add_triple(KnowledgeTriple(subject_entity, predicate, object_entity))
+    for triple in triples:
+        graph.add_triple(KnowledgeTriple(*triple))
 
     llm = ChatOpenAI(
-        api_key=open_ai_api_key, model="gpt-4", temperature=0, max_retries=2
+        api_key=open_ai_api_key,
+        model=config.LANGCHAIN_MODEL,
+        temperature=0,
+        max_retries=2,
     )
 
     chain = GraphQAChain.from_llm(llm=llm, graph=graph, verbose=True)
 
-    if response := chain.invoke({"query": question}):
-        answer = response.get("result")
-        ui_utils.add_result_to_state(question, answer)
+    with get_openai_callback() as callback:
+        response = chain.invoke({"query": question})
+    usage = {
+        "model": config.LANGCHAIN_MODEL,
+        "prompt_tokens": callback.prompt_tokens,
+        "completion_tokens": callback.completion_tokens,
+        "context_triples": len(triples),
+    }
+    return (response.get("result") if response else None), usage
 
 
 if __name__ == "__main__":
@@ -1,19 +1,37 @@
 """Utilities for interacting with Llama Index for Graph RAG."""
 
+import tiktoken
 from llama_index.core import KnowledgeGraphIndex
+from llama_index.core.callbacks import CallbackManager, TokenCountingHandler
 from llama_index.core.schema import TextNode
 from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.llms.openai import OpenAI
 from llama_index.core.llms import ChatMessage, MessageRole
 import streamlit as st
-import utils.ui_utils as ui_utils  # pylint: disable=consider-using-from-import, import-error
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
 
 
-def init_llama_index_graph(graph_nx, open_ai_api_key):
+def create_token_counter():
+    """
+    Token counter for the LLM calls made by the chat engine.
+    """
+    return TokenCountingHandler(
+        tokenizer=tiktoken.encoding_for_model(config.LLAMA_INDEX_MODEL).encode
+    )
+
+
+@telemetry.timed()
+def init_llama_index_graph(graph_nx, open_ai_api_key, token_counter=None):
     """
     Construct a knowledge graph using llama index.
     """
-    llm = OpenAI(model="gpt-3.5-turbo", api_key=open_ai_api_key)
+    callback_manager = CallbackManager([token_counter] if token_counter else [])
+    llm = OpenAI(
+        model=config.LLAMA_INDEX_MODEL,
+        api_key=open_ai_api_key,
+        callback_manager=callback_manager,
+    )
     embed_model = OpenAIEmbedding(api_key=open_ai_api_key)
 
     graph = KnowledgeGraphIndex(
@@ -41,9 +59,11 @@ def init_llama_index_graph(graph_nx, open_ai_api_key):
     return chat_engine
 
 
-def query_llama_index_graph(query_engine, question):
+@telemetry.timed()
+def query_llama_index_graph(query_engine, question, token_counter=None):
     """
     Query llama index knowledge graph using graph RAG.
+    Returns the answer and the token usage of the call.
     """
     graph_answers = st.session_state.get("graph_answers", [])
     chat_history = []
@@ -53,8 +73,23 @@ def query_llama_index_graph(query_engine, question):
             ChatMessage(role=MessageRole.ASSISTANT, content=answer)
         )
 
-    if response := query_engine.chat(question, chat_history):
-        ui_utils.add_result_to_state(question, response.response)
+    if token_counter:
+        token_counter.reset_counts()
+    response = query_engine.chat(question, chat_history)
+    usage = {"model": config.LLAMA_INDEX_MODEL}
+    if token_counter:
+        usage["prompt_tokens"] = token_counter.prompt_llm_token_count
+        usage["completion_tokens"] = token_counter.completion_llm_token_count
+    return (response.response if response else None), usage
+
+
+def answer_llama_index_graph(graph_nx, open_ai_api_key, question):
+    """
+    Build the chat engine and answer a question, only called on a response cache miss.
+    """
+    token_counter = create_token_counter()
+    query_engine = init_llama_index_graph(graph_nx, open_ai_api_key, token_counter)
+    return query_llama_index_graph(query_engine, question, token_counter)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,264 @@
+"""Utilities for caching Graph RAG responses and accounting for token usage and latency."""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def normalize_question(question):
+    """
+    Normalize a question so trivial differences in case, spacing and trailing punctuation still hit the cache.
+    """
+    question = " ".join((question or "").lower().split())
+    return re.sub(r"[\s?.!]+$", "", question)
+
+
+def history_window(question, chat_history):
+    """
+    The most recent chat turns that give context to a question. Earlier turns asking
+    the same question are left out, so asking it again does not change its own key.
+    """
+    question = normalize_question(question)
+    turns = [
+        [query, answer]
+        for query, answer in chat_history or []
+        if normalize_question(query) != question
+    ]
+    return turns[-config.RAG_CACHE_HISTORY_TURNS :]
+
+
+def cache_key(question, graph_key, chat_history, backend):
+    """
+    Key a response on the normalized question, the graph and a bounded window of the chat context.
+    """
+    payload = json.dumps(
+        {
+            "question": normalize_question(question),
+            "graph": graph_key,
+            "history": history_window(question, chat_history),
+            "backend": backend,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite backed response cache with a TTL and least recently used eviction.
+    """
+
+    def __init__(
+        self,
+        path=config.RAG_CACHE_PATH,
+        max_entries=config.RAG_CACHE_MAX_ENTRIES,
+        ttl_seconds=config.RAG_CACHE_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        if directory := os.path.dirname(path):
+            os.makedirs(directory, exist_ok=True)
+        with self.connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    question TEXT,
+                    response TEXT,
+                    usage TEXT,
+                    created REAL,
+                    last_access REAL
+                )
+                """)
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+            )
+
+    @contextlib.contextmanager
+    def connect(self):
+        """
+        Short lived connection, committed on success.
+        """
+        with contextlib.closing(sqlite3.connect(self.path, timeout=10)) as connection:
+            with connection:
+                yield connection
+
+    def get(self, key):
+        """
+        Return the cached (response, usage) for key, or None if missing or expired.
+        """
+        now = time.time()
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT response, usage, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            response, usage, created = row
+            if self.ttl_seconds and now - created > self.ttl_seconds:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            connection.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+        return response, json.loads(usage)
+
+    def put(self, key, question, response, usage):
+        """
+        Store a response and evict the least recently used entries above max_entries.
+        """
+        now = time.time()
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, question, response, json.dumps(usage), now, now),
+            )
+            connection.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        with self.connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def get_response_cache():
+    """
+    Shared response cache for the process.
+    """
+    global _CACHE  # pylint: disable=global-statement
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ResponseCache()
+        return _CACHE
+
+
+def new_usage():
+    """
+    Empty per session usage record.
+    """
+    return {
+        "questions": 0,
+        "cache_hits": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "latency_seconds": 0.0,
+        "estimated_cost": 0.0,
+    }
+
+
+def estimate_cost(usage):
+    """
+    Estimated cost in dollars of a response from its token usage and model.
+    """
+    prompt_cost, completion_cost = config.RAG_MODEL_COSTS.get(
+        usage.get("model"), (0.0, 0.0)
+    )
+    return (
+        usage.get("prompt_tokens", 0) * prompt_cost
+        + usage.get("completion_tokens", 0) * completion_cost
+    ) / 1000
+
+
+def record_usage(session_usage, usage, latency, cache_hit):
+    """
+    Add one answered question to the session usage, cached answers cost no tokens.
+    """
+    session_usage["questions"] += 1
+    session_usage["latency_seconds"] += latency
+    if cache_hit:
+        session_usage["cache_hits"] += 1
+        return
+    session_usage["prompt_tokens"] += usage.get("prompt_tokens", 0)
+    session_usage["completion_tokens"] += usage.get("completion_tokens", 0)
+    session_usage["estimated_cost"] += estimate_cost(usage)
+    telemetry.increment(
+        "rag_tokens_total", usage.get("prompt_tokens", 0), kind="prompt"
+    )
+    telemetry.increment(
+        "rag_tokens_total", usage.get("completion_tokens", 0), kind="completion"
+    )
+
+
+def candidate_keys(question, graph_key, chat_history, backend):
+    """
+    Cache keys to try for a question, its own key first and then the keys it was
+    stored under when asked earlier in the same chat, most recent first.
+    """
+    chat_history = list(chat_history or [])
+    keys = [cache_key(question, graph_key, chat_history, backend)]
+    for index in reversed(range(len(chat_history))):
+        if normalize_question(chat_history[index][0]) == normalize_question(question):
+            keys.append(cache_key(question, graph_key, chat_history[:index], backend))
+    return list(dict.fromkeys(keys))
+
+
+def usage_summary(usage):
+    """
+    One line summary of the session usage, or None until a question has been answered.
+    Failed answers are not counted, so the usage record can exist with no questions.
+    """
+    if not usage or not usage["questions"]:
+        return None
+    return (
+        f"{usage['questions']} questions, {usage['cache_hits']} from cache | "
+        f"{usage['prompt_tokens']:,} prompt and {usage['completion_tokens']:,} completion tokens | "
+        f"~${usage['estimated_cost']:.4f} | "
+        f"{usage['latency_seconds'] / usage['questions']:.1f}s average latency"
+    )
+
+
+def cached_answer(  # pylint: disable=too-many-arguments
+    question,
+    graph_key,
+    chat_history,
+    backend,
+    compute,
+    session_usage=None,
+    cache=None,
+):
+    """
+    Return the answer to a question, from the cache when possible.
+    compute is only called on a miss and returns (answer, usage) where usage
+    holds the model name and prompt/completion token counts.
+    """
+    if cache is None:
+        cache = get_response_cache()
+    key, *earlier_keys = candidate_keys(question, graph_key, chat_history, backend)
+    start = time.perf_counter()
+    with telemetry.span("rag_answer", backend=backend) as attributes:
+        cached = cache.get(key)
+        for earlier_key in earlier_keys:
+            if cached:
+                break
+            cached = cache.get(earlier_key)
+        if cached:
+            answer, usage = cached
+        else:
+            answer, usage = compute()
+            if answer:
+                cache.put(key, question, answer, usage)
+        attributes.update(cache_hit=bool(cached), **usage)
+    telemetry.record_cache("rag_responses", bool(cached))
+    if session_usage is not None and answer:
+        record_usage(session_usage, usage, time.perf_counter() - start, bool(cached))
+    return answer
+
+
+if __name__ == "__main__":
+    pass
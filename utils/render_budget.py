@@ -0,0 +1,174 @@
+"""Utilities for choosing how much of a result set to draw from its estimated size and measured stage costs."""
+
+import contextlib
+import threading
+import time
+import networkx as nx
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.graph_rows as graph_rows  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
+
+FULL = "full"
+CLUSTERED = "clustered"
+TABLE = "table"
+
+BUILD_STAGES = ["create_networkx"]
+RENDER_STAGES = ["convert_graph", "render_graphs", "browser"]
+
+_COSTS = {}
+_LOCK = threading.Lock()
+
+
+def record_stage_cost(stage, seconds, elements):
+    """
+    Update the smoothed seconds per node or edge of a stage.
+    """
+    if elements <= 0:
+        return
+    cost = seconds / elements
+    with _LOCK:
+        previous = _COSTS.get(stage)
+        if previous is not None:
+            cost = previous + config.RENDER_COST_SMOOTHING * (cost - previous)
+        _COSTS[stage] = cost
+    telemetry.set_gauge("stage_seconds_per_element", cost, stage=stage)
+
+
+def stage_cost(stage):
+    """
+    Measured seconds per node or edge of a stage, or the configured prior before the first measurement.
+    """
+    with _LOCK:
+        return _COSTS.get(stage, config.RENDER_STAGE_COSTS[stage])
+
+
+@contextlib.contextmanager
+def measure(stage, **attributes):
+    """
+    Telemetry span that also records the stage cost once nodes and edges are set on it.
+    """
+    start = time.perf_counter()
+    with telemetry.span(stage, **attributes) as span_attributes:
+        yield span_attributes
+    record_stage_cost(
+        stage,
+        time.perf_counter() - start,
+        span_attributes.get("nodes", 0) + span_attributes.get("edges", 0),
+    )
+
+
+def estimate_graph_size(data):
+    """
+    Count the nodes and edges create_networkx would build from records without building it,
+    along with the size of the organisation level summary.
+    """
+    nodes, edges, summary_nodes, summary_edges = set(), set(), set(), set()
+    for (
+        _,
+        funder_name,
+        project_title,
+        lead_research_organisation,
+        people,
+    ) in graph_rows.iter_graph_rows(data):
+        nodes.update((funder_name, project_title, lead_research_organisation))
+        edges.add((funder_name, project_title))
+        edges.add((lead_research_organisation, project_title))
+        summary_nodes.update((funder_name, lead_research_organisation))
+        summary_edges.add((funder_name, lead_research_organisation))
+        for person_name, _, _ in people:
+            nodes.add(person_name)
+            edges.add((person_name, project_title))
+    return {
+        "nodes": len(nodes),
+        "edges": len(edges),
+        "summary_nodes": len(summary_nodes),
+        "summary_edges": len(summary_edges),
+    }
+
+
+def graph_size(graph):
+    """
+    Node and edge counts of a built graph, along with the size of its organisation level summary.
+    """
+    groups = dict(graph.nodes(data="group"))
+    project_funders, project_organisations = {}, {}
+    for source, target in graph.edges():
+        if groups.get(source) == "funder_name":
+            project_funders.setdefault(target, []).append(source)
+        elif groups.get(source) == "lead_research_organisation":
+            project_organisations.setdefault(target, []).append(source)
+    summary_edges = {
+        (funder, organisation)
+        for project, organisations in project_organisations.items()
+        for organisation in organisations
+        for funder in project_funders.get(project, [])
+    }
+    return {
+        "nodes": len(groups),
+        "edges": graph.number_of_edges(),
+        "summary_nodes": sum(
+            group in ("funder_name", "lead_research_organisation")
+            for group in groups.values()
+        ),
+        "summary_edges": len(summary_edges),
+    }
+
+
+def predict_seconds(stages, elements):
+    """
+    Predicted time for stages over a number of nodes and edges.
+    """
+    return sum(stage_cost(stage) for stage in stages) * elements
+
+
+def choose_view(size, built=False, budget=None):
+    """
+    Draw the full graph if it fits the latency budget, otherwise the organisation level
+    summary, otherwise only a table of the records. The budget covers build and render
+    only, the records and their per project detail requests have already been fetched.
+    """
+    budget = config.RENDER_LATENCY_BUDGET_SECONDS if budget is None else budget
+    elements = size["nodes"] + size["edges"]
+    build_seconds = 0 if built else predict_seconds(BUILD_STAGES, elements)
+    if build_seconds + predict_seconds(RENDER_STAGES, elements) <= budget:
+        return FULL
+    summary_elements = size["summary_nodes"] + size["summary_edges"]
+    if build_seconds + predict_seconds(RENDER_STAGES, summary_elements) <= budget:
+        return CLUSTERED
+    return TABLE
+
+
+def summarize_graph(graph):
+    """
+    Organisation level view of a graph, projects and people are folded into their lead
+    organisation and funding is summed on funder to organisation edges.
+    """
+    summary = nx.DiGraph()
+    for project_title, data in graph.nodes(data=True):
+        if data.get("group") != "project_title":
+            continue
+        funders, organisations = [], []
+        for node in graph.predecessors(project_title):
+            group = graph.nodes[node].get("group")
+            if group == "funder_name":
+                funders.append(node)
+            elif group == "lead_research_organisation":
+                organisations.append(node)
+        for node in funders + organisations:
+            if not summary.has_node(node):
+                summary.add_node(node, **graph.nodes[node], projects=0)
+        for organisation in organisations:
+            summary.nodes[organisation]["projects"] += 1
+            for funder in funders:
+                value = graph[funder][project_title].get("value") or 0
+                if summary.has_edge(funder, organisation):
+                    summary[funder][organisation]["value"] += value
+                else:
+                    summary.add_edge(funder, organisation, value=value)
+    for _, _, data in summary.edges(data=True):
+        data["title"] = data["label"] = f"£{data['value']:,.2f}"
+    return summary
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,115 @@
+"""Utilities for typeahead search over graph entities used by the filter form."""
+
+import bisect
+import heapq
+import threading
+from collections import OrderedDict
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.entity_resolution as entity_resolution  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
+
+_INDEX_CACHE = OrderedDict()
+_INDEX_LOCK = threading.Lock()
+
+
+class GroupSearchIndex:
+    """
+    Prefix and trigram index over the option labels of one node group.
+    """
+
+    def __init__(self, group_data, rank_key):
+        self.group_data = group_data
+        self.ranks = {item[0]: rank_key(item) for item in group_data.items()}
+        self.top = sorted(group_data, key=lambda label: self.ranks[label], reverse=True)
+        # Every token suffix of a label is indexed so "smi" and "jane smi" both match "Jane Smith".
+        entries = []
+        for label, item in group_data.items():
+            tokens = entity_resolution.normalize_name(str(item.get("label"))).split()
+            for index in range(len(tokens)):
+                entries.append((" ".join(tokens[index:]), label))
+        entries.sort()
+        self.prefix_keys = [key for key, _ in entries]
+        self.prefix_labels = [label for _, label in entries]
+        self.trigram_index = None
+
+    def prefix_matches(self, query):
+        """
+        Labels with a token sequence starting with the query.
+        """
+        start = bisect.bisect_left(self.prefix_keys, query)
+        end = bisect.bisect_left(self.prefix_keys, query + "\uffff")
+        return set(self.prefix_labels[start:end])
+
+    def fuzzy_matches(self, query):
+        """
+        Labels similar to the query, the trigram index is built on first use.
+        """
+        if self.trigram_index is None:
+            self.trigram_index = entity_resolution.NGramIndex()
+            for label, item in self.group_data.items():
+                self.trigram_index.add(
+                    label, entity_resolution.normalize_name(str(item.get("label")))
+                )
+        return {
+            label
+            for label, _ in self.trigram_index.search(
+                query, config.TYPEAHEAD_FUZZY_THRESHOLD, containment=True
+            )
+        }
+
+    def search(self, query, limit):
+        """
+        Return up to limit labels, prefix matches first, each tier ordered by rank.
+        """
+        if not (query := entity_resolution.normalize_name(query)):
+            return self.top[:limit]
+        rank = self.ranks.__getitem__
+        results = heapq.nlargest(limit, self.prefix_matches(query), key=rank)
+        if len(results) < limit:
+            fuzzy = self.fuzzy_matches(query) - set(results)
+            results += heapq.nlargest(limit - len(results), fuzzy, key=rank)
+        return results
+
+
+class EntitySearchIndex:  # pylint: disable=too-few-public-methods
+    """
+    Typeahead index over annotated node data, one sub index per group built lazily.
+    """
+
+    def __init__(self, annotated_node_data, rank_key):
+        self.annotated_node_data = annotated_node_data
+        self.rank_key = rank_key
+        self.groups = {}
+        self.lock = threading.Lock()
+
+    def search(self, group, query, limit=config.TYPEAHEAD_LIMIT):
+        """
+        Return the top option labels for a group matching the query.
+        """
+        with self.lock:
+            if group not in self.groups:
+                self.groups[group] = GroupSearchIndex(
+                    self.annotated_node_data.get(group, {}), self.rank_key
+                )
+            index = self.groups[group]
+        return index.search(query, limit)
+
+
+def get_search_index(key, annotated_node_data, rank_key):
+    """
+    Return the search index for a graph, building it once per key.
+    """
+    with _INDEX_LOCK:
+        telemetry.record_cache("search_index", key in _INDEX_CACHE)
+        if key in _INDEX_CACHE:
+            _INDEX_CACHE.move_to_end(key)
+            return _INDEX_CACHE[key]
+        index = EntitySearchIndex(annotated_node_data, rank_key)
+        _INDEX_CACHE[key] = index
+        while len(_INDEX_CACHE) > config.TYPEAHEAD_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+        return index
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,229 @@
+"""Utilities for running UKRI searches as background jobs so the Streamlit script thread never blocks."""
+
+import concurrent.futures
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.entity_resolution as entity_resolution  # pylint: disable=consider-using-from-import, import-error
+import utils.export as export  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
+import utils.ukri_utils as ukri_utils  # pylint: disable=consider-using-from-import, import-error
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+REJECTED = "rejected"
+FINISHED = {DONE, FAILED, CANCELLED, REJECTED}
+
+_RUNNER = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def result_key(search_term, number_of_results):
+    """
+    Shared cache key for the results of a search.
+    """
+    return entity_resolution.normalize_name(search_term), number_of_results
+
+
+class SearchJob:  # pylint: disable=too-many-instance-attributes, too-few-public-methods
+    """
+    One search submitted by a user, polled by the session until it finishes.
+    """
+
+    def __init__(self, job_id, user_key, search_term, number_of_results):
+        self.job_id = job_id
+        self.user_key = user_key
+        self.search_term = search_term
+        self.number_of_results = number_of_results
+        self.key = result_key(search_term, number_of_results)
+        self.status = QUEUED
+        self.error = None
+        self.data = None
+        self.submitted = time.time()
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def cancelled(self):
+        """
+        True once a newer search from the same user has superseded this one.
+        """
+        return self.cancel_event.is_set()
+
+
+class SearchJobRunner:  # pylint: disable=too-many-instance-attributes
+    """
+    Bounded worker pool where each user has at most one active search, a new search from
+    a user cancels the one it supersedes. Finished results go to a cache shared by all sessions.
+    """
+
+    def __init__(
+        self,
+        fetch=ukri_utils.fetch_search_data,
+        workers=config.SEARCH_JOB_WORKERS,
+        max_pending=config.SEARCH_JOB_MAX_PENDING,
+    ):
+        self.fetch = fetch
+        self.max_pending = max_pending
+        self.executor = concurrent.futures.ThreadPoolExecutor(  # pylint: disable=consider-using-with
+            workers, thread_name_prefix="search_job"
+        )
+        self.jobs = {}
+        self.user_jobs = {}
+        self.results = OrderedDict()
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def submit(self, user_key, search_term, number_of_results):
+        """
+        Queue a search for a user, returning the job to poll.
+        """
+        with self.lock:
+            self.prune()
+            if previous := self.user_jobs.pop(user_key, None):
+                self.cancel_job(previous)
+            job = SearchJob(next(self.ids), user_key, search_term, number_of_results)
+            self.jobs[job.job_id] = job
+            telemetry.record_cache("search_results", job.key in self.results)
+            if job.key in self.results:
+                self.results.move_to_end(job.key)
+                job.data = self.results[job.key]
+                self.finish(job, DONE)
+                return job
+            pending = sum(
+                other.status in (QUEUED, RUNNING)
+                for other in self.jobs.values()
+                if other is not job
+            )
+            if pending >= self.max_pending:
+                self.finish(job, REJECTED)
+                return job
+            self.user_jobs[user_key] = job
+            job.future = self.executor.submit(self.run, job)
+            return job
+
+    def run(self, job):
+        """
+        Worker body, fetching the search unless it was cancelled while queued.
+        """
+        with self.lock:
+            if job.cancelled():
+                return
+            job.status = RUNNING
+        with telemetry.span(
+            "search_ukri_workflow", number_of_results=job.number_of_results
+        ) as attributes:
+            try:
+                data = self.fetch(
+                    job.search_term,
+                    job.number_of_results,
+                    attributes,
+                    cancelled=job.cancelled,
+                )
+            except Exception as error:  # pylint: disable=broad-except
+                logging.exception("ERROR search job: %s", error)
+                data, job.error = None, str(error)
+        if data and config.EXPORT_SAVE_DATASETS:
+            try:
+                export.save_dataset(job.search_term, job.number_of_results, data)
+            except OSError as error:
+                logging.exception("ERROR save_dataset: %s", error)
+        with self.lock:
+            if data:
+                # Kept even when superseded, another session may ask for the same search.
+                self.results[job.key] = data
+                while len(self.results) > config.SEARCH_RESULT_CACHE_SIZE:
+                    self.results.popitem(last=False)
+            if job.cancelled():
+                self.finish(job, CANCELLED)
+            else:
+                job.data = data
+                self.finish(job, DONE if data else FAILED)
+
+    def cancel_job(self, job):
+        """
+        Cancel a queued job outright and ask a running job to stop at its next stage.
+        """
+        if job.status in FINISHED:
+            return
+        job.cancel_event.set()
+        if job.status == QUEUED:
+            if job.future:
+                job.future.cancel()
+            self.finish(job, CANCELLED)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job by id.
+        """
+        with self.lock:
+            if job := self.jobs.get(job_id):
+                self.cancel_job(job)
+
+    def finish(self, job, status):
+        """
+        Record the final status of a job, it is no longer its user's active job.
+        """
+        job.status = status
+        job.finished = time.time()
+        self.release(job)
+        telemetry.increment("search_jobs_total", status=status)
+
+    def release(self, job):
+        """
+        Stop tracking a job as its user's active search.
+        """
+        if self.user_jobs.get(job.user_key) is job:
+            del self.user_jobs[job.user_key]
+
+    def prune(self):
+        """
+        Forget finished jobs that have not been polled for the retention period.
+        """
+        expiry = time.time() - config.SEARCH_JOB_RETENTION_SECONDS
+        for job_id, job in list(self.jobs.items()):
+            if job.status in FINISHED and job.finished < expiry:
+                self.release(job)
+                del self.jobs[job_id]
+
+    def status(self, job_id):
+        """
+        Current status of a job, or None if it is unknown.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job.status if job else None
+
+    def collect(self, job_id):
+        """
+        Hand the results of a finished job to its owner and forget the job. Results are kept
+        on the job until then, so evictions from the shared cache do not lose them.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job or job.status not in FINISHED:
+                return None
+            del self.jobs[job_id]
+            self.release(job)
+            return job.data if job.status == DONE else None
+
+
+def get_runner():
+    """
+    Shared job runner for the process.
+    """
+    global _RUNNER  # pylint: disable=global-statement
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            _RUNNER = SearchJobRunner()
+        return _RUNNER
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,235 @@
+"""Utilities for timing spans, counters and a Prometheus-format metrics export."""
+
+import contextlib
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+
+_LOCK = threading.Lock()
+_COUNTERS = defaultdict(float)
+_GAUGES = {}
+_SPAN_STATS = defaultdict(lambda: {"count": 0, "sum": 0.0, "max": 0.0, "errors": 0})
+_RECENT_SPANS = deque(maxlen=config.TELEMETRY_RECENT_SPANS)
+_METRICS_SERVER = None
+
+
+def label_key(labels):
+    """
+    Hashable, ordered representation of metric labels.
+    """
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """
+    Time a block of work. The yielded dict can be updated with attributes such as
+    payload or graph sizes, which are kept with the span for the debug panel.
+    """
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield attributes
+    except Exception:
+        failed = True
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        with _LOCK:
+            stats = _SPAN_STATS[name]
+            stats["count"] += 1
+            stats["sum"] += duration
+            stats["max"] = max(stats["max"], duration)
+            stats["errors"] += int(failed)
+            if name not in config.TELEMETRY_DETAIL_SPANS:
+                _RECENT_SPANS.append(
+                    {
+                        "span": name,
+                        "seconds": duration,
+                        "error": failed,
+                        "thread": threading.current_thread().name,
+                        **attributes,
+                    }
+                )
+        logging.debug("span=%s seconds=%.4f attributes=%s", name, duration, attributes)
+
+
+def timed(name=None):
+    """
+    Decorator recording a span around every call of the function.
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name or function.__name__):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def increment(name, value=1, **labels):
+    """
+    Add to a counter, e.g. requests or cache hits.
+    """
+    with _LOCK:
+        _COUNTERS[(name, label_key(labels))] += value
+
+
+def set_gauge(name, value, **labels):
+    """
+    Record the latest value of a measurement, e.g. graph size.
+    """
+    with _LOCK:
+        _GAUGES[(name, label_key(labels))] = value
+
+
+def record_cache(cache, hit):
+    """
+    Count a cache lookup as a hit or a miss.
+    """
+    increment("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def cache_hit_rates():
+    """
+    Hit rate per cache name.
+    """
+    totals = defaultdict(lambda: {"hit": 0.0, "miss": 0.0})
+    with _LOCK:
+        for (name, labels), value in _COUNTERS.items():
+            if name == "cache_requests_total":
+                labels = dict(labels)
+                totals[labels["cache"]][labels["result"]] += value
+    return {
+        cache: counts["hit"] / (counts["hit"] + counts["miss"])
+        for cache, counts in totals.items()
+        if counts["hit"] + counts["miss"]
+    }
+
+
+def snapshot():
+    """
+    Copy of the current spans, counters and gauges.
+    """
+    with _LOCK:
+        return {
+            "spans": {name: dict(stats) for name, stats in _SPAN_STATS.items()},
+            "recent_spans": list(_RECENT_SPANS),
+            "counters": dict(_COUNTERS),
+            "gauges": dict(_GAUGES),
+        }
+
+
+def reset():
+    """
+    Clear all recorded telemetry.
+    """
+    with _LOCK:
+        _COUNTERS.clear()
+        _GAUGES.clear()
+        _SPAN_STATS.clear()
+        _RECENT_SPANS.clear()
+
+
+def escape_label_value(value):
+    """
+    Escape a label value for the Prometheus text format.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    """
+    Prometheus label set, e.g. {cache="metrics",result="hit"}.
+    """
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{key}="{escape_label_value(value)}"' for key, value in labels)
+        + "}"
+    )
+
+
+def render_prometheus():
+    """
+    Render all telemetry in the Prometheus text exposition format.
+    """
+    prefix = config.TELEMETRY_PREFIX
+    data = snapshot()
+    lines = [
+        f"# HELP {prefix}_span_seconds Time spent in instrumented stages.",
+        f"# TYPE {prefix}_span_seconds summary",
+    ]
+    for name, stats in sorted(data["spans"].items()):
+        labels = format_labels((("span", name),))
+        lines.append(f"{prefix}_span_seconds_count{labels} {stats['count']}")
+        lines.append(f"{prefix}_span_seconds_sum{labels} {stats['sum']:.6f}")
+    lines.append(f"# TYPE {prefix}_span_errors_total counter")
+    for name, stats in sorted(data["spans"].items()):
+        labels = format_labels((("span", name),))
+        lines.append(f"{prefix}_span_errors_total{labels} {stats['errors']}")
+
+    for kind, metrics in [("counter", data["counters"]), ("gauge", data["gauges"])]:
+        for metric_name in sorted({name for name, _ in metrics}):
+            lines.append(f"# TYPE {prefix}_{metric_name} {kind}")
+            for (name, labels), value in sorted(metrics.items()):
+                if name == metric_name:
+                    lines.append(f"{prefix}_{name}{format_labels(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """
+    Serve the Prometheus export on /metrics.
+    """
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Return the metrics text or 404.
+        """
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Silence per request logging.
+        """
+
+
+def start_metrics_server(port=config.METRICS_PORT, host=config.METRICS_HOST):
+    """
+    Start the /metrics endpoint once per process when a port is configured,
+    bound to localhost unless METRICS_HOST says otherwise.
+    """
+    global _METRICS_SERVER  # pylint: disable=global-statement
+    with _LOCK:
+        if _METRICS_SERVER or not port:
+            return _METRICS_SERVER
+        try:
+            _METRICS_SERVER = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as error:
+            logging.exception("ERROR start_metrics_server: %s", error)
+            return None
+        _METRICS_SERVER.daemon_threads = True
+        threading.Thread(target=_METRICS_SERVER.serve_forever, daemon=True).start()
+        return _METRICS_SERVER
+
+
+if __name__ == "__main__":
+    pass
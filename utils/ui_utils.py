@@ -1,11 +1,19 @@
 """Utilities for Streamlit UI components."""
 
-# pylint: disable = unused-import
+import importlib
 import re
+import uuid
+import networkx as nx
 import streamlit as st
-import utils.llama_index_utils as llama_index_utils  # pylint: disable=consider-using-from-import, import-error
 import utils.config as config  # pylint: disable=consider-using-from-import, import-error
-import utils.langchain_utils as langchain_utils  # pylint: disable=consider-using-from-import, import-error
+import utils.graph_builder as graph_builder  # pylint: disable=consider-using-from-import, import-error
+import utils.render_budget as render_budget  # pylint: disable=consider-using-from-import, import-error
+import utils.search_index as search_index  # pylint: disable=consider-using-from-import, import-error
+import utils.ukri_utils as ukri_utils  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
+import utils.rag_cache as rag_cache  # pylint: disable=consider-using-from-import, import-error
+import utils.graph_metrics as graph_metrics  # pylint: disable=consider-using-from-import, import-error
+import utils.search_jobs as search_jobs  # pylint: disable=consider-using-from-import, import-error
 
 
 def add_result_to_state(question, response):
@@ -35,6 +43,146 @@ def render_chat_results():
             st.rerun()
 
 
+def submit_search_job(search_term, number_of_results):
+    """
+    Queue a search in the background, superseding any search still running for this session.
+    """
+    user_key = st.session_state.setdefault("user_key", str(uuid.uuid4()))
+    job = search_jobs.get_runner().submit(user_key, search_term, number_of_results)
+    st.session_state["search_job_id"] = job.job_id
+    st.session_state.pop("search_job_notice", None)
+
+
+@st.fragment(run_every=config.SEARCH_JOB_POLL_SECONDS)
+def render_search_job_status():
+    """
+    Poll the session's search job, loading the results into state and rerunning the app once it is done.
+    Other final statuses are kept as a notice and the job is forgotten.
+    """
+    job_id = st.session_state.get("search_job_id")
+    if not job_id:
+        render_search_job_notice()
+        return
+    runner = search_jobs.get_runner()
+    status = runner.status(job_id)
+    if status in (search_jobs.QUEUED, search_jobs.RUNNING):
+        st.info(f"Search {status}, results will appear when ready.", icon="⏳")
+        if st.button("Cancel search"):
+            runner.cancel(job_id)
+        return
+    data = runner.collect(job_id)
+    del st.session_state["search_job_id"]
+    if status == search_jobs.DONE and data:
+        st.session_state["data"] = data
+        st.rerun()
+    elif status == search_jobs.REJECTED:
+        st.session_state["search_job_notice"] = (
+            "warning",
+            "Too many searches are running, please try again shortly.",
+        )
+    elif status == search_jobs.CANCELLED:
+        st.session_state["search_job_notice"] = ("caption", "Search cancelled.")
+    else:
+        st.session_state["search_job_notice"] = (
+            "error",
+            "Request failed, please try again later.",
+        )
+    render_search_job_notice()
+
+
+def render_search_job_notice():
+    """
+    Render the outcome of the session's last search when it did not return results.
+    """
+    if notice := st.session_state.get("search_job_notice"):
+        level, message = notice
+        if level == "caption":
+            st.caption(message)
+        else:
+            getattr(st, level)(message, icon="⚠️")
+
+
+def render_graph_view(data):
+    """
+    Render the search results as a full graph, an organisation summary or a table,
+    whichever fits the latency budget.
+    """
+    size = render_budget.estimate_graph_size(data)
+    if render_budget.choose_view(size) == render_budget.TABLE:
+        st.caption(
+            f"About {size['nodes']:,} nodes and {size['edges']:,} edges is too many to draw within the latency budget, showing a table."
+        )
+        ukri_utils.render_results_table(data)
+        return
+    graph, net = build_filtered_graph(data)
+
+    if (filter_determinant := st.session_state.get("filter")) and (
+        filter_determinant == "Filter results"
+    ):
+        if st.session_state.get("search_nodes_label"):
+            graph_ui, graph_rag = st.tabs(["Render graph", "Graph RAG"])
+            with graph_ui:
+                if st.button("Render graph"):
+                    with st.spinner("Rendering graph, please wait"):
+                        ukri_utils.render_graphs(net)
+            with graph_rag:
+                render_graph_rag_interface(graph)
+                render_chat_results()
+    else:
+        if st.button("Render graph"):
+            with st.spinner("Rendering graph, please wait"):
+                ukri_utils.render_graphs(net)
+
+
+def build_filtered_graph(data):
+    """
+    Build the graph, render the filter form and return the filtered graph with
+    its pyvis network, summarised when it is too large to draw in full.
+    """
+    graph = graph_builder.build_graph(data)
+    graph_key = graph_metrics.graph_hash(graph)
+    metrics = graph_metrics.get_graph_metrics(graph, graph_key)
+    if not metrics:
+        render_metrics_status(graph_key)
+    annotated_node_data = ukri_utils.annotate_networkx_data(graph, metrics)
+    entity_search_index = search_index.get_search_index(
+        (graph_key, metrics is not None),
+        annotated_node_data,
+        ukri_utils.node_rank_key,
+    )
+    ukri_utils.render_filter_form(annotated_node_data, graph, entity_search_index)
+    graph = nx.subgraph_view(graph, filter_node=ukri_utils.filter_node)
+    ukri_utils.annotate_value_on_graph(graph)
+    graph_metrics.annotate_centrality_on_graph(graph, metrics)
+    if (
+        render_budget.choose_view(render_budget.graph_size(graph), built=True)
+        == render_budget.FULL
+    ):
+        return graph, ukri_utils.convert_graph(graph)
+    st.caption(
+        "The graph is too large to draw in full, showing funders and lead organisations. Filter results to see projects and people."
+    )
+    return graph, ukri_utils.convert_graph(render_budget.summarize_graph(graph))
+
+
+@st.fragment(run_every=config.METRICS_POLL_SECONDS)
+def render_metrics_status(graph_key):
+    """
+    Poll the background metrics of the graph, rerunning the app once they are ready.
+    """
+    if graph_metrics.metrics_ready(graph_key):
+        st.rerun()
+    elif graph_metrics.metrics_pending(graph_key):
+        st.caption("Centrality metrics are being computed in the background.")
+
+
+def rag_backend(backend):
+    """
+    Import a Graph RAG backend on first use, so llama_index and langchain are only loaded when a question is asked.
+    """
+    return importlib.import_module(config.RAG_BACKEND_MODULES[backend])
+
+
 def render_graph_rag_interface(graph):
     """
     Render interface for Graph RAG.
@@ -43,7 +191,6 @@ def render_graph_rag_interface(graph):
 
     if open_ai_api_key:
 
-        query_engine = llama_index_utils.init_llama_index_graph(graph, open_ai_api_key)
         entity_str = ", ".join(st.session_state.get("search_nodes_label", []))
         options = [
             re.sub(r"(\(.*?\))", "", question.replace("[entity]", entity_str))
@@ -62,13 +209,78 @@ def render_graph_rag_interface(graph):
                 with st.spinner("Ask Question"):
 
                     if question:
-                        # langchain_utils.construct_graph_langchain(graph, open_ai_api_key, question)
-                        llama_index_utils.query_llama_index_graph(
-                            query_engine, final_question
+                        # The backend is only imported and the chat engine built when the answer is not cached.
+                        # Use rag_backend("langchain").construct_graph_langchain for the Langchain backend.
+                        answer = rag_cache.cached_answer(
+                            final_question,
+                            graph_metrics.graph_hash(graph),
+                            st.session_state.get("graph_answers", []),
+                            "llama_index",
+                            lambda: rag_backend("llama_index").answer_llama_index_graph(
+                                graph, open_ai_api_key, final_question
+                            ),
+                            session_usage=st.session_state.setdefault(
+                                "rag_usage", rag_cache.new_usage()
+                            ),
                         )
+                        add_result_to_state(final_question, answer)
                     else:
                         st.toast("Please submit a question")
 
+        render_rag_usage()
+
+
+def render_rag_usage():
+    """
+    Render token, cost and latency accounting for the session.
+    """
+    if summary := rag_cache.usage_summary(st.session_state.get("rag_usage")):
+        st.caption(summary)
+
+
+def render_debug_panel():
+    """
+    Render timing spans, cache hit rates and sizes recorded by telemetry.
+    """
+    data = telemetry.snapshot()
+    with st.expander("Debug metrics"):
+        st.write("Stage timings")
+        st.dataframe(
+            [
+                {
+                    "span": name,
+                    "count": stats["count"],
+                    "mean seconds": stats["sum"] / stats["count"],
+                    "max seconds": stats["max"],
+                    "errors": stats["errors"],
+                }
+                for name, stats in sorted(data["spans"].items())
+                if stats["count"]
+            ]
+        )
+        st.write("Cache hit rates")
+        st.json(telemetry.cache_hit_rates())
+        st.write("Counters and gauges")
+        st.dataframe(
+            [
+                {
+                    "metric": name,
+                    "labels": ", ".join(f"{key}={value}" for key, value in labels),
+                    "value": metric_value,
+                }
+                for (name, labels), metric_value in sorted(
+                    {**data["counters"], **data["gauges"]}.items()
+                )
+            ]
+        )
+        st.write("Recent spans")
+        st.dataframe(list(reversed(data["recent_spans"])))
+        st.download_button(
+            "Download Prometheus metrics",
+            telemetry.render_prometheus(),
+            file_name="metrics.txt",
+        )
+
 
 if __name__ == "__main__":
     pass
@@ -9,10 +9,34 @@ import uuid
 import urllib.parse
 import logging
 import requests
-from pyvis.network import Network
 import networkx as nx
 import streamlit as st
 import utils.config as config  # pylint: disable=consider-using-from-import, import-error
+import utils.entity_resolution as entity_resolution  # pylint: disable=consider-using-from-import, import-error
+import utils.graph_rows as graph_rows  # pylint: disable=consider-using-from-import, import-error
+import utils.render_budget as render_budget  # pylint: disable=consider-using-from-import, import-error
+import utils.search_index as search_index  # pylint: disable=consider-using-from-import, import-error
+import utils.telemetry as telemetry  # pylint: disable=consider-using-from-import, import-error
+
+
+def request_gtr(endpoint, url):
+    """
+    GET a GtR api url, recording request counts, latency and payload size.
+    """
+    with telemetry.span("gtr_request", endpoint=endpoint) as attributes:
+        try:
+            response = requests.get(url, timeout=10)
+        except Exception:
+            telemetry.increment("gtr_requests_total", endpoint=endpoint, status="error")
+            raise
+        attributes.update(status=response.status_code, bytes=len(response.content))
+    telemetry.increment(
+        "gtr_requests_total", endpoint=endpoint, status=response.status_code
+    )
+    telemetry.increment(
+        "gtr_response_bytes_total", len(response.content), endpoint=endpoint
+    )
+    return response
 
 
 def search_ukri_projects(args):
@@ -25,9 +49,9 @@ def search_ukri_projects(args):
         encoded_search_term = urllib.parse.quote(search_term)
         if (
             (
-                response := requests.get(
-                    f"https://gtr.ukri.org/api/search/project?term={encoded_search_term}&page={page_number}&fetchSize={page_size}&selectedSortableField=pro.am&selectedSortOrder=DESC&selectedFacets=&fields=project.abs",
-                    timeout=10,
+                response := request_gtr(
+                    "search",
+                    f"{config.GTR_API_URL}/search/project?term={encoded_search_term}&page={page_number}&fetchSize={page_size}&selectedSortableField=pro.am&selectedSortOrder=DESC&selectedFacets=&fields=project.abs",
                 )
             )
             and (response.status_code == 200)
@@ -43,6 +67,7 @@ def search_ukri_projects(args):
     return []
 
 
+@telemetry.timed()
 def search_ukri_paginate(search_term, number_of_results, page_size=100):
     """
     Asynchronous pagination requests for project lookup.
@@ -105,9 +130,9 @@ def get_ukri_project_data(project_grant_reference):
     try:
         if (
             (
-                response := requests.get(
-                    f"https://gtr.ukri.org/api/projects?ref={project_grant_reference}",
-                    timeout=10,
+                response := request_gtr(
+                    "projects",
+                    f"{config.GTR_API_URL}/projects?ref={project_grant_reference}",
                 )
             )
             and (response.status_code == 200)
@@ -119,6 +144,7 @@ def get_ukri_project_data(project_grant_reference):
     return []
 
 
+@telemetry.timed()
 def get_project_data(data):
     """
     Asynchronously lookup project data.
@@ -141,15 +167,20 @@ def get_project_data(data):
     }
 
 
-def search_ukri_workflow(search_term, number_of_results):
+def fetch_search_data(
+    search_term, number_of_results, attributes=None, cancelled=lambda: False
+):
     """
-    Main workflow for searching UKRI data from a search term and limited by the number of search results.
-    The results are then saved to state.
+    Fetch, parse and resolve search results without touching session state, so it can run in a background job.
+    Returns None if a request failed or cancelled() became true between stages.
     """
+    attributes = {} if attributes is None else attributes
     if (
         (projects := search_ukri_paginate(search_term, number_of_results))
+        and not cancelled()
         and (data := parse_data(projects))
         and (project_data_lookup := get_project_data(data))
+        and not cancelled()
     ):
         augmented_data = [
             {
@@ -162,9 +193,10 @@ def search_ukri_workflow(search_term, number_of_results):
             }
             for project in data
         ]
-        st.session_state["data"] = augmented_data
-    else:
-        st.error("Request failed, please try again later.", icon="⚠️")
+        attributes.update(projects=len(projects), records=len(data))
+        with telemetry.span("resolve_entities", records=len(augmented_data)):
+            return entity_resolution.resolve_entities(augmented_data)
+    return None
 
 
 def get_link_html(link, text):
@@ -178,15 +210,19 @@ def render_graphs(net):
     """
     Helper to render graph visualization from pyvis graph.
     """
-    uuid4 = uuid.uuid4()
-    file_name = f"./output/{uuid4}.html"
-    with contextlib.suppress(FileNotFoundError):
+    with render_budget.measure(
+        "render_graphs", nodes=len(net.nodes), edges=len(net.edges)
+    ) as attributes:
+        uuid4 = uuid.uuid4()
+        file_name = f"./output/{uuid4}.html"
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(file_name)
+        net.save_graph(file_name)
+        with open(file_name, "r", encoding="utf-8") as html_file:
+            source_code = html_file.read()
+        attributes["html_bytes"] = len(source_code)
+        st.components.v1.html(source_code, height=650, width=650)
         os.remove(file_name)
-    net.save_graph(file_name)
-    with open(file_name, "r", encoding="utf-8") as html_file:
-        source_code = html_file.read()
-    st.components.v1.html(source_code, height=650, width=650)
-    os.remove(file_name)
 
 
 def set_networkx_attribute(graph, node_label, attribute_name, value):
@@ -201,10 +237,8 @@ def append_networkx_value(graph, node_label, attribute_name, value):
     """
     Helper to append value to current node attribute scalar value.
     """
-    current_map = nx.get_node_attributes(graph, attribute_name, default=0)
-    current_value = current_map[node_label]
-    current_value = current_value + value
-    set_networkx_attribute(graph, node_label, attribute_name, current_value)
+    node_data = graph.nodes[node_label]
+    node_data[attribute_name] = node_data.get(attribute_name, 0) + value
 
 
 def calculate_total_funding_from_group(graph, group):
@@ -234,6 +268,7 @@ def set_weighted_size_helper(graph, node_label, totals, data):
         set_networkx_attribute(graph, node_label, "size", funding_percentage)
 
 
+@telemetry.timed()
 def annotate_value_on_graph(graph):
     """
     Calculate normalized graph sizes and append to title.
@@ -286,102 +321,142 @@ def create_networkx(data):
     """
     Create networkx graph from UKRI data.
     """
-    graph = nx.DiGraph()
-    for row in data:
-        if (
-            (funder_name := row.get("funder_name"))
-            and (project_title := row.get("project_title"))
-            and (lead_research_organisation := row.get("lead_research_organisation"))
-        ):
-
-            project_data_lookup = row.get("project_data_lookup", {})
+    return merge_partial_tables(
+        [build_partial_tables(data)], first_project_data_lookup(data)
+    )
 
-            # TODO remove, too many nodes.
-            # add_project_orgs(graph, project_data_lookup, project_title)
 
-            if not graph.has_node(funder_name):
-                graph.add_node(
-                    funder_name, title=funder_name, group="funder_name", size=100
-                )
-            if not graph.has_node(project_title):
-                link_html = get_link_html(
+def build_partial_tables(rows):
+    """
+    Build node, edge, role and funding tables from records, the single home of the graph rules.
+    Nodes and edges keep the attributes of their first record, person role edges
+    also record the last role seen and funding is summed per node.
+    The serial builder uses one table for all records, the parallel builder one per shard.
+    """
+    nodes, edges, roles, funding = {}, {}, {}, {}
+    for (
+        row,
+        funder_name,
+        project_title,
+        lead_research_organisation,
+        people,
+    ) in graph_rows.iter_graph_rows(rows):
+        # TODO remove, too many nodes.
+        # add_project_orgs(graph, project_data_lookup, project_title)
+
+        if funder_name not in nodes:
+            nodes[funder_name] = {
+                "title": funder_name,
+                "group": "funder_name",
+                "size": 100,
+            }
+        if project_title not in nodes:
+            nodes[project_title] = {
+                "title": get_link_html(
                     row.get("project_url", "").replace("api/", ""), project_title
-                )
-                graph.add_node(
-                    project_title,
-                    title=link_html,
-                    group="project_title",
-                    project_data_lookup=project_data_lookup,
-                    size=25,
-                )
-            if not graph.has_edge(funder_name, project_title):
-                graph.add_edge(
-                    funder_name,
-                    project_title,
-                    value=row.get("value"),
-                    title=f"{'£{:,.2f}'.format(row.get('value'))}",
-                    label=f"{'£{:,.2f}'.format(row.get('value'))}",
-                )
-
-        if not graph.has_node(lead_research_organisation):
-            link_html = get_link_html(
-                row.get("lead_research_organisation_link").replace("api/", ""),
-                lead_research_organisation,
-            )
-            graph.add_node(
-                lead_research_organisation,
-                title=link_html,
-                group="lead_research_organisation",
-                size=50,
-            )
-        if not graph.has_edge(lead_research_organisation, project_title):
-            graph.add_edge(
-                lead_research_organisation, project_title, title="RELATES TO"
-            )
+                ),
+                "group": "project_title",
+                "project_data_lookup": {},
+                "size": 25,
+            }
+        if (funder_name, project_title) not in edges:
+            edges[(funder_name, project_title)] = {
+                "value": row.get("value"),
+                "title": f"{'£{:,.2f}'.format(row.get('value'))}",
+                "label": f"{'£{:,.2f}'.format(row.get('value'))}",
+            }
+        if lead_research_organisation not in nodes:
+            nodes[lead_research_organisation] = {
+                "title": get_link_html(
+                    row.get("lead_research_organisation_link").replace("api/", ""),
+                    lead_research_organisation,
+                ),
+                "group": "lead_research_organisation",
+                "size": 50,
+            }
+        if (lead_research_organisation, project_title) not in edges:
+            edges[(lead_research_organisation, project_title)] = {"title": "RELATES TO"}
 
-        append_networkx_value(graph, funder_name, "funding", row.get("value", 0))
-        append_networkx_value(graph, project_title, "funding", row.get("value", 0))
-        append_networkx_value(
-            graph, lead_research_organisation, "funding", row.get("value", 0)
-        )
+        for node_label in [funder_name, project_title, lead_research_organisation]:
+            funding[node_label] = funding.get(node_label, 0) + row.get("value", 0)
 
         # TODO Too many nodes are added if all relations are added
-        person_roles = row.get(
-            "people", []
-        )  # + project_data_lookup.get("projectComposition").get("personRoles",[])
-
-        for person in person_roles:
-            if (
-                (person_name := person.get("fullName"))
-                and (person_link := person.get("resourceUrl"))
-                and (project_title := row.get("project_title"))
-                and (roles := person.get("roles"))
-            ):
-                if not graph.has_node(person_name):
-                    link_html = get_link_html(
-                        person_link.replace("api/", ""), person_name
-                    )
-                    graph.add_node(
-                        person_name, title=link_html, group="person_name", size=10
-                    )
-                for role in roles:
-                    if (not graph.has_edge(person_name, project_title)) or (
-                        not graph[person_name][project_title]["title"]
-                        == role.get("name")
-                    ):
-                        graph.add_edge(
-                            person_name,
-                            project_title,
-                            title=role.get("name"),
-                            label=role.get("name"),
-                        )
+        # + project_data_lookup.get("projectComposition").get("personRoles",[])
+        add_person_tables((nodes, edges, roles), project_title, people)
+    return nodes, edges, roles, funding
+
+
+def add_person_tables(tables, project_title, people):
+    """
+    Add the people of a project to the node, edge and role tables.
+    """
+    nodes, edges, roles = tables
+    for person_name, person_link, person_roles in people:
+        if person_name not in nodes:
+            nodes[person_name] = {
+                "title": get_link_html(person_link.replace("api/", ""), person_name),
+                "group": "person_name",
+                "size": 10,
+            }
+        for role in person_roles:
+            if (person_name, project_title) not in edges:
+                edges[(person_name, project_title)] = {
+                    "title": role.get("name"),
+                    "label": role.get("name"),
+                }
+            roles[(person_name, project_title)] = role.get("name")
+
+
+def first_project_data_lookup(data):
+    """
+    Project data lookup of the first complete record for each project title.
+    The lookups are kept out of the shard tables and restored on merge.
+    """
+    lookups = {}
+    for row, _, project_title, _, _ in graph_rows.iter_graph_rows(data):
+        lookups.setdefault(project_title, row.get("project_data_lookup", {}))
+    return lookups
+
+
+def merge_partial_tables(partial_tables, project_data_lookups):
+    """
+    Merge tables in order and materialize the graph. First writer wins for nodes
+    and edges, the last role wins for person edges and funding is summed.
+    """
+    nodes, edges, roles, funding = {}, {}, {}, {}
+    for shard_nodes, shard_edges, shard_roles, shard_funding in partial_tables:
+        for node_label, data in shard_nodes.items():
+            nodes.setdefault(node_label, data)
+        for edge, data in shard_edges.items():
+            edges.setdefault(edge, data)
+        roles.update(shard_roles)
+        for node_label, value in shard_funding.items():
+            funding[node_label] = funding.get(node_label, 0) + value
+
+    for edge, value in roles.items():
+        if edges[edge].get("title") != value:
+            edges[edge] = {**edges[edge], "title": value, "label": value}
+    for node_label, value in funding.items():
+        nodes[node_label]["funding"] = value
+    for node_label, data in nodes.items():
+        if data.get("group") == "project_title":
+            data["project_data_lookup"] = project_data_lookups.get(node_label, {})
+
+    graph = nx.DiGraph()
+    graph.add_nodes_from(nodes.items())
+    graph.add_edges_from(
+        (source, target, data) for (source, target), data in edges.items()
+    )
     return graph
 
 
-def annotate_networkx_data(graph):
+@telemetry.timed()
+def annotate_networkx_data(graph, metrics=None):
     """
-    Annotate number of neighbors for filtering.
+    Annotate number of neighbors, and centrality when available, for filtering.
     """
+    pagerank = (metrics or {}).get("pagerank", {})
+    community = (metrics or {}).get("community", {})
     annotated_node_data = {}
     for node_label, data in graph.nodes(data=True):
         if group := data.get("group"):
@@ -392,15 +467,33 @@ def annotate_networkx_data(graph):
             annotated_node_data[group][f"{node_label} ({neighbor_len})"] = {
                 "neighbor_len": neighbor_len,
                 "label": node_label,
+                "pagerank": pagerank.get(node_label),
+                "funding": data.get("funding"),
+                "community": community.get(node_label),
             }
     return annotated_node_data
 
 
+def node_rank_key(item):
+    """
+    Sort key for filter options, PageRank first with the number of neighbors and funding as fallbacks.
+    """
+    _, node_data = item
+    return (
+        node_data.get("pagerank") or 0.0,
+        node_data.get("neighbor_len"),
+        node_data.get("funding") or 0,
+    )
+
+
 def convert_graph(graph):
     """
     Convert networkx to pyvis graph.
+    pyvis is imported here on first use to keep it out of app start up.
     """
-    net = Network(
+    import pyvis.network  # pylint: disable=import-outside-toplevel
+
+    net = pyvis.network.Network(
         height="700px",
         width="100%",
         bgcolor="#222222",
@@ -408,10 +501,31 @@ def convert_graph(graph):
         directed=True,
     )
     net.barnes_hut()
-    net.from_nx(graph)
+    with render_budget.measure("convert_graph") as attributes:
+        net.from_nx(graph)
+        attributes.update(nodes=len(net.nodes), edges=len(net.edges))
     return net
 
 
+def render_results_table(data):
+    """
+    Table of the records, used when the graph is too large to draw within the latency budget.
+    """
+    st.dataframe(
+        [
+            {
+                "Project": row.get("project_title"),
+                "Funder": row.get("funder_name"),
+                "Lead organisation": row.get("lead_research_organisation"),
+                "Value (£)": row.get("value"),
+                "People": len(row.get("people") or []),
+            }
+            for row in data
+        ],
+        use_container_width=True,
+    )
+
+
 def find_neighbor_nodes_helper(node_list, graph):
     """
     Find unique node neighbors and flatten.
@@ -431,10 +545,14 @@ def find_neighbor_nodes_helper(node_list, graph):
     return list(set(flat))
 
 
-def render_filter_form(annotated_node_data, graph):
+def render_filter_form(annotated_node_data, graph, entity_search_index=None):
     """
     Render form to allow the user to define search nodes.
+    Options come from a typeahead index so the multiselect only holds the top matches.
     """
+    entity_search_index = entity_search_index or search_index.EntitySearchIndex(
+        annotated_node_data, node_rank_key
+    )
     st.session_state["filter"] = st.radio(
         "Filter", ["No filter", "Filter results"], index=0, horizontal=True
     )
@@ -445,19 +563,24 @@ def render_filter_form(annotated_node_data, graph):
             "Entity type", list(annotated_node_data.keys())
         )
         if node_group := st.session_state.get("node_group"):
-            ordered_lookup = dict(
-                sorted(
-                    annotated_node_data[node_group].items(),
-                    key=lambda item: item[1].get("neighbor_len"),
-                    reverse=True,
-                )
+            group_lookup = annotated_node_data[node_group]
+            selected = [
+                label
+                for label in st.session_state.get("search_nodes_label") or []
+                if label in group_lookup
+            ]
+            query = st.text_input("Search entities", key="search_entity_query")
+            matches = entity_search_index.search(
+                node_group, query, config.TYPEAHEAD_LIMIT
             )
             st.session_state["search_nodes_label"] = st.multiselect(
-                "Filter projects", list(ordered_lookup.keys())
+                "Filter projects",
+                selected + [label for label in matches if label not in selected],
+                default=selected,
             )
         if search_nodes_label := st.session_state.get("search_nodes_label"):
             filter_nodes = [
-                ordered_lookup[label].get("label") for label in search_nodes_label
+                group_lookup[label].get("label") for label in search_nodes_label
             ]
             search_nodes_neighbors = find_neighbor_nodes_helper(filter_nodes, graph)
             search_nodes = find_neighbor_nodes_helper(search_nodes_neighbors, graph)